@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from frame_loop import draw_tracks, track_labels
+from governor import load_profile
+from proximity import DETECTION_THRESHOLD, HAZARD_THRESHOLD, DepthPostProcessor, ProximityAlerts
+from tracker import Sort
+
+warnings.filterwarnings("ignore")
+
+OVERLAP_FRAMES = 30  # Frames replayed before each segment so tracks and alert state are warm
+TRACK_IDS_PER_FRAME = 1000  # Track id block per frame; a segment's ids start at start * this
+
+# Models are loaded once per worker process by init_worker
+near = None
+depth_processor = DepthPostProcessor()
+
+
+def init_worker(torch_threads):
+    """Load the models in this process and give it a fair share of the cores."""
+    global near
+    import torch
+    torch.set_num_threads(torch_threads)
+    cv2.setNumThreads(1)
+    import near as near_module
+    near = near_module
+
+
+def analyse_frame(frame):
+    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    depth_array = np.array(near.depth_estimator(image)["depth"])
+    # The returned map is a reused buffer, replaced by the next analysed frame
+    depth_array = depth_processor.process(depth_array)
+    results = near.model(frame)
+    return depth_array, near.detections_from_xyxy(results.xyxy[0], results.names, HAZARD_THRESHOLD)
+
+
+def process_segment(video_path, start, end, frame_skip, out_dir, annotate):
+    """Analyse frames [start, end) of video_path and write them to out_dir/<start>.jsonl.
+
+    Decoding starts OVERLAP_FRAMES early; those frames drive the tracker but are not
+    written, so objects already in view at the seam are tracked, and not announced
+    again as newly close, from the segment's first frame. Each segment numbers its
+    tracks from start * TRACK_IDS_PER_FRAME, so ids never collide between segments,
+    but a track that crosses a seam continues under a new id.
+    """
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    warmup_start = max(0, start - OVERLAP_FRAMES)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, warmup_start)
+
+    tracker = Sort(max_age=3 * frame_skip)
+    tracker.next_id = start * TRACK_IDS_PER_FRAME + 1
+    depth_array = None
+    alerts = ProximityAlerts()
+    writer = None
+    records_path = os.path.join(out_dir, f"{start:010d}.jsonl")
+
+    with open(records_path, "w") as records:
+        for index in range(warmup_start, end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if (index - warmup_start) % frame_skip == 0 or depth_array is None:
+                depth_array, detections = analyse_frame(frame)
+                tracks = tracker.update(detections)
+            else:
+                tracks = tracker.predict()
+
+            close_tracks = near.check_track_proximity(depth_array, tracks, lambda obj: near.object_thresholds.get(obj, 20))
+            events = alerts.update(close_tracks)
+            if index < start:
+                continue
+
+            records.write(json.dumps({
+                "frame": index,
+                "time_s": round(index / fps, 3),
+                "detections": [{"track_id": t.id, "name": t.name, "conf": round(t.conf, 3),
+                                "box": [round(v, 1) for v in t.box],
+                                "depth": None if t.depth is None else round(t.depth, 2)}
+                               for t in tracks],
+                "close": sorted({t.name for t in close_tracks}),
+                "events": events,
+            }) + "\n")
+
+            if annotate:
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(os.path.join(out_dir, f"{start:010d}.mp4"),
+                                             cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+                draw_tracks(frame, track_labels(tracks, close_tracks, DETECTION_THRESHOLD),
+                            {t.name for t in close_tracks})
+                writer.write(frame)
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+    return start
+
+
+def split_segments(total_frames, workers, min_segment=300):
+    """Split [0, total_frames) into roughly equal segments, a few per worker for load balance."""
+    count = max(1, min(workers * 4, total_frames // min_segment))
+    bounds = np.linspace(0, total_frames, count + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def merge_outputs(out_dir, starts, output_path, video_path):
+    if output_path.endswith(".parquet"):
+        import pandas as pd
+        rows = []
+        for start in starts:
+            with open(os.path.join(out_dir, f"{start:010d}.jsonl")) as f:
+                rows.extend(json.loads(line) for line in f)
+        pd.DataFrame(rows).to_parquet(output_path)
+    else:
+        with open(output_path, "w") as out:
+            for start in starts:
+                with open(os.path.join(out_dir, f"{start:010d}.jsonl")) as f:
+                    shutil.copyfileobj(f, out)
+
+    if video_path:
+        writer = None
+        for start in starts:
+            cap = cv2.VideoCapture(os.path.join(out_dir, f"{start:010d}.mp4"))
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"),
+                                             cap.get(cv2.CAP_PROP_FPS) or 30.0, (width, height))
+                writer.write(frame)
+            cap.release()
+        if writer is not None:
+            writer.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analyse a recorded video without a display, as fast as the hardware allows. "
+                    "Writes per-frame detections, box depths and proximity events.")
+    parser.add_argument("video", help="Input video file")
+    parser.add_argument("-o", "--output", default="analysis.jsonl", help="Output .jsonl or .parquet")
+    parser.add_argument("--video-out", default=None, help="Optional annotated output video (.mp4)")
+    parser.add_argument("--workers", type=int, default=load_profile()["pool_workers"],
+                        help="Worker processes (default: pool_workers from the resource profile)")
+    parser.add_argument("--frame-skip", type=int, default=1, help="Run the models every Nth frame, tracking in between")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total_frames <= 0:
+        raise SystemExit(f"Could not read frame count from {args.video}")
+
+    segments = split_segments(total_frames, args.workers)
+    torch_threads = max(1, (os.cpu_count() or 1) // args.workers)
+    print(f"Analysing {total_frames} frames in {len(segments)} segments on {args.workers} workers")
+
+    start_time = time.time()
+    with tempfile.TemporaryDirectory() as out_dir:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(torch_threads,)) as pool:
+            futures = [pool.submit(process_segment, args.video, start, end, args.frame_skip,
+                                   out_dir, args.video_out is not None)
+                       for start, end in segments]
+            for done, future in enumerate(futures, 1):
+                future.result()
+                print(f"Segment {done}/{len(segments)} done")
+        merge_outputs(out_dir, [start for start, _ in segments], args.output, args.video_out)
+
+    elapsed = time.time() - start_time
+    print(f"Wrote {args.output} in {elapsed:.1f}s ({total_frames / elapsed:.1f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
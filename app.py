@@ -1,53 +1,77 @@
 import cv2
 import torch
-from PIL import Image
-import numpy as np
-from near import depth_estimator, model as near_model, normalize_depth, smooth_depth, check_proximity, object_thresholds
-from vision import model as vision_model, get_compact_directions
+from governor import load_profile, apply_profile, pin_current_thread
+
+# Thread budgets have to be in place before the models in near.py are loaded and run
+resource_profile = load_profile()
+apply_profile(resource_profile)
+
+from near import depth_estimator, model as near_model
+from vision import get_compact_directions
 import math
 import warnings
 import pyttsx3
 import queue
 import speech_recognition as sr
-from recognition import recognize_faces
+import recognition
 import threading
+import time
+from audio_frontend import AudioFrontEnd, MicrophoneSource
+from object_memory import ObjectMemory, describe_last_seen
+from quality import QualityController, TierModels
+from capture import FrameReader
+from frame_loop import VisionStages, FRAME_SKIP, DETECTION_THRESHOLD
+from pipeline import Stage, Scheduler
 
 warnings.filterwarnings("ignore")
 
-# Initialize text-to-speech engine and queues
-engine = pyttsx3.init()
+# Initialize queues; the TTS engine is owned by the speech thread
 speech_queue = queue.Queue()
 voice_command_queue = queue.Queue()
 
-# Initialize voice recognition components
+# Initialize voice recognition components; the front end gates silence locally
 recognizer = sr.Recognizer()
-mic = sr.Microphone()
+voice_frontend = AudioFrontEnd(MicrophoneSource())
+
+DEPTH_SCALE = 1.0  # Post-process depth at this fraction of the model's output resolution
+RECORD_PATH = None  # Set to a directory to record depth maps and detections for replay tuning
+FACE_RATE_HZ = 2.0  # Face identification for the overlay runs at most this often
+FRAME_DEADLINE_MS = 100.0  # Optional stages are deferred when a frame would run past this
 
-# Initialize face recognition components
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-recognizer_face = cv2.face.LBPHFaceRecognizer_create()
-recognizer_face.read("trained_model.yml")
+# Latest analysed frame, replaced as a whole so readers never see a half-updated view
+latest_snapshot = None
+snapshot_lock = threading.Lock()
 
-relationships = {
-    1: {"name": "Akshay Kumar", "relationships": "Friend"}
-}
+# Recent sightings per class, so objects that just left the view can still be located
+object_memory = ObjectMemory()
 
 # Function to speak text using the speech queue
 def speak(text):
     """Queue speech requests instead of calling runAndWait() in multiple threads."""
     speech_queue.put(text)
 
+def speech_worker():
+    """Thread that owns the TTS engine so replies never wait for the frame loop."""
+    pin_current_thread(resource_profile, "helpers")
+    engine = pyttsx3.init()
+    while True:
+        text_to_speak = speech_queue.get()
+        try:
+            engine.say(text_to_speak)
+            engine.runAndWait()
+        except Exception as e:
+            print(f"Speech Error: {e}")
+
 # Function to listen for voice commands continuously in a separate thread
 def voice_listener():
     """Thread for continuous voice recognition."""
-    with mic as source:
-        recognizer.adjust_for_ambient_noise(source)
-        speak("Voice assistant activated. Say 'hi [object]' or 'who'.")
+    pin_current_thread(resource_profile, "helpers")
+    voice_frontend.start(calibrate_s=1)
+    speak("Voice assistant activated. Say 'hi [object]' or 'who'.")
 
     while True:
         try:
-            with mic as source:
-                audio = recognizer.listen(source, phrase_time_limit=3)
+            audio = voice_frontend.listen(phrase_time_limit=3)
             text = recognizer.recognize_google(audio).lower()
             if text.startswith(('hi', 'who')):
                 voice_command_queue.put(text)
@@ -57,134 +81,150 @@ def voice_listener():
         except Exception as e:
             print(f"Voice error: {e}")
 
-# Start the voice listener in a separate thread
+def publish_snapshot(frame, detections, close_objects):
+    """Publish the latest frame and its analysis for the command executor."""
+    global latest_snapshot
+    snapshot = {
+        "frame": frame,
+        "detections": detections,  # (x1, y1, x2, y2, conf, name) above DETECTION_THRESHOLD
+        "close_objects": close_objects,
+        "timestamp": time.time(),
+    }
+    with snapshot_lock:
+        latest_snapshot = snapshot
+
+def get_snapshot():
+    with snapshot_lock:
+        return latest_snapshot
+
+def handle_find_object(obj_name, snapshot):
+    """Answer 'hi <object>' from the detections already computed for the snapshot."""
+    image_height, image_width = snapshot["frame"].shape[:2]
+    object_positions = [((x1 + x2) / 2, (y1 + y2) / 2)
+                        for x1, y1, x2, y2, conf, name in snapshot["detections"]
+                        if name == obj_name]
+
+    if object_positions:
+        start_x, start_y = image_width / 2, image_height / 2
+        nearest_obj = min(object_positions,
+                          key=lambda pos: math.sqrt((pos[0] - start_x)**2 + (pos[1] - start_y)**2))
+        directions = get_compact_directions(start_x, start_y,
+                                            nearest_obj[0], nearest_obj[1])
+        speak(f"Directions to {obj_name}: {directions}")
+        return
+
+    sighting = object_memory.latest(obj_name)
+    if sighting is not None:
+        speak(describe_last_seen(obj_name, sighting))
+    else:
+        speak(f"{obj_name} not found in current view.")
+
+def identify_faces(frame, detections):
+    """Identify faces in frame, searching only where YOLO saw people."""
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    person_boxes = [(x1, y1, x2, y2) for x1, y1, x2, y2, conf, name in detections
+                    if name == 'person']
+    return recognition.identify_faces(gray_frame, person_boxes)
+
+def handle_who(snapshot):
+    """Identify the first face in the snapshot frame, searching only where YOLO saw people."""
+    faces_detected = identify_faces(snapshot["frame"], snapshot["detections"])
+
+    if len(faces_detected) > 0:
+        box, person_info, confident = faces_detected[0]  # Process only the first detected face
+        if not confident:
+            speak("Person not recognized.")
+        elif person_info:
+            speak(f"{person_info['name']}, your {person_info['relationships']}")
+        else:
+            speak("Unknown person detected.")
+    else:
+        speak("No faces detected.")
+
+def handle_command(command, snapshot):
+    command = command.lower()
+    if snapshot is None:
+        speak("Still starting up, please try again.")
+    elif command.startswith('hi '):  # Handle object directions (e.g., "hi chair")
+        handle_find_object(command.split('hi ', 1)[-1], snapshot)
+    elif command == 'who':  # Handle face recognition (e.g., "who")
+        handle_who(snapshot)
+
+def command_executor():
+    """Thread that drains voice commands and answers them from the latest snapshot."""
+    pin_current_thread(resource_profile, "helpers")
+    while True:
+        commands = [voice_command_queue.get()]
+        while True:
+            try:
+                commands.append(voice_command_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        snapshot = get_snapshot()
+        for command in commands:
+            try:
+                handle_command(command, snapshot)
+            except Exception as e:
+                print(f"Command error: {e}")
+
+# Start the speech, voice listener and command threads
+speech_thread = threading.Thread(target=speech_worker, daemon=True)
+speech_thread.start()
 voice_thread = threading.Thread(target=voice_listener, daemon=True)
 voice_thread.start()
+command_thread = threading.Thread(target=command_executor, daemon=True)
+command_thread.start()
 
 # Main video processing loop variables
 video_path = '/Users/reetvikchatterjee/Desktop/VisionHelp/test.mp4'  # Replace with your video path
-cap = cv2.VideoCapture(video_path)
-
-FRAME_SKIP = 3  # Process every 3rd frame for efficiency
-frame_count = 0
-DETECTION_THRESHOLD = 0.7  # Confidence threshold for object detection
-
-# Main video processing loop
-while cap.isOpened():
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame_count += 1
-    if frame_count % FRAME_SKIP != 0:
-        continue  # Skip this frame
-
-    # Process frame for nearby object detection using depth estimation
-    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-    depth_map = depth_estimator(image)["depth"]
-    depth_array = np.array(depth_map)
-    depth_array = normalize_depth(depth_array)
-    depth_array = smooth_depth(depth_array)
-
-    results = near_model(frame)
-    close_objects, all_objects = check_proximity(depth_array, results, lambda obj: object_thresholds.get(obj, 20))
-
-    for obj in results.xyxy[0]:
-        x1, y1, x2, y2, conf, cls = obj.tolist()
-        if conf < DETECTION_THRESHOLD:
-            continue  # Skip objects below the confidence threshold
-
-        x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
-        cls = int(cls)
-        object_name = results.names[cls]
-        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-        cv2.putText(frame, f"{object_name}: {conf:.2f}", (x1, y1 - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-
-    if close_objects:
-        warning_message = f"Warning: {', '.join(set(close_objects))} nearby!"
-        cv2.putText(frame, warning_message, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-        print(warning_message)
-        speak(warning_message)
-
-    # Process voice commands from the queue
-    if not voice_command_queue.empty():
-        command = voice_command_queue.get().lower()
-
-        # Handle object directions (e.g., "hi chair")
-        if command.startswith('hi '):
-            obj_name = command.split('hi ', 1)[-1]
-            image_width, image_height = image.size[0], image.size[1]
-            results_vision = vision_model(image)
-            detections = results_vision.pandas().xyxy[0]
-            object_positions = {}
-
-            for _, obj in detections.iterrows():
-                if obj['confidence'] < DETECTION_THRESHOLD:
-                    continue
-
-                name = obj['name']
-                xmin, ymin, xmax, ymax = obj[['xmin', 'ymin', 'xmax', 'ymax']]
-                center_x = (xmin + xmax) / 2
-                center_y = (ymin + ymax) / 2
-
-                if name == obj_name:
-                    if name in object_positions:
-                        object_positions[name].append((center_x, center_y))
-                    else:
-                        object_positions[name] = [(center_x, center_y)]
-
-            if obj_name in object_positions:
-                start_x, start_y = image_width / 2, image_height / 2
-                nearest_obj = min(object_positions[obj_name], 
-                                  key=lambda pos: math.sqrt((pos[0] - start_x)**2 + (pos[1] - start_y)**2))
-                directions = get_compact_directions(start_x, start_y,
-                                                    nearest_obj[0], nearest_obj[1])
-                speak(f"Directions to {obj_name}: {directions}")
-            else:
-                speak(f"{obj_name} not found in current view.")
-
-        # Handle face recognition (e.g., "who")
-        elif command == 'who':
-            gray_frame = cv2.cvtColor(frame.copy(), cv2.COLOR_BGR2GRAY)
-            faces_detected = face_cascade.detectMultiScale(gray_frame,
-                                                           scaleFactor=1.1,
-                                                           minNeighbors=5,
-                                                           minSize=(30, 30))
-
-            if len(faces_detected) > 0:
-                for (x, y, w, h) in faces_detected[:1]:  # Process only the first detected face
-                    roi_gray = gray_frame[y:y+h, x:x+w]
-                    label_face_recog, confidence_face_recog = recognizer_face.predict(roi_gray)
-
-                    if confidence_face_recog < 70:  # Lower confidence is better in LBPHFaceRecognizer
-                        person_info = relationships.get(label_face_recog)
-                        if person_info:
-                            speak(f"{person_info['name']}, your {person_info['relationships']}")
-                        else:
-                            speak("Unknown person detected.")
-                    else:
-                        speak("Person not recognized.")
-            else:
-                speak("No faces detected.")
-
+SHOW_VIDEO = True  # Without a window, frames between detector runs are grabbed but never decoded
+
+# Decoding runs on its own thread; live sources always hand over their newest frame
+cap = FrameReader(video_path, skip=1 if SHOW_VIDEO else FRAME_SKIP)
+detect_every = FRAME_SKIP if SHOW_VIDEO else 1  # In delivered frames
+
+quality = QualityController()  # Steps model size and depth resolution to hold the latency target
+tier_models = TierModels(depth_estimator, {"yolov5s": near_model})
+tier_models.preload(quality.tier)  # Neighbouring tiers load in the background while this one runs
+vision = VisionStages(tier_models, quality,
+                      object_memory=object_memory, publish=publish_snapshot, speak=speak,
+                      detect_every=detect_every, depth_scale=DEPTH_SCALE, record_path=RECORD_PATH,
+                      detection_threshold=DETECTION_THRESHOLD)
+
+def face_stage(frame, tracks):
+    # Track boxes are predicted to this frame, unlike the last detector run's boxes
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    person_boxes = [tuple(map(int, t.box)) for t in tracks if t.name == 'person']
+    return {"faces": recognition.identify_faces(gray_frame, person_boxes)}
+
+def display(frame):
     # Display the processed video frame with bounding boxes and warnings
     cv2.imshow('Video', frame)
 
-    # Process speech queue in the main loop to handle TTS requests sequentially
-    while not speech_queue.empty():
-        try:
-            text_to_speak = speech_queue.get_nowait()
-            engine.say(text_to_speak)
-            engine.runAndWait()
-        except Exception as e:
-            print(f"Speech Error: {e}")
-
     # Press 'q' to quit the program manually
     if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+        raise StopIteration
+
+# Stages run at their own cadence on the latest values; add new ones here
+stages = vision.analysis_stages(vision.capture_stage(cap.read))
+if SHOW_VIDEO:
+    stages += [
+        Stage("faces", face_stage, inputs=["frame", "tracks"], outputs=["faces"], rate_hz=FACE_RATE_HZ),
+        vision.render_stage(),
+        Stage("face_labels", recognition.draw_faces, inputs=["frame", "faces"], critical=True),
+        Stage("display", display, inputs=["frame"], critical=True),
+    ]
+scheduler = Scheduler(stages, deadline_ms=FRAME_DEADLINE_MS)
+
+# Main video processing loop; inference runs on this thread
+pin_current_thread(resource_profile, "inference")
+if cap.isOpened():
+    scheduler.run()
+print(scheduler.report())
 
 # Clean up
+vision.close()
 cap.release()
 cv2.destroyAllWindows()
 voice_thread.join(timeout=1)
@@ -0,0 +1,218 @@
+import collections
+import wave
+
+import numpy as np
+import speech_recognition as sr
+
+try:
+    import webrtcvad
+except ImportError:  # Energy gating alone is used when webrtcvad is missing
+    webrtcvad = None
+
+FRAME_MS = 30  # Analysis frame length (webrtcvad accepts 10, 20 or 30 ms)
+PRE_ROLL_MS = 300  # Audio kept from before the trigger so word onsets survive
+HANGOVER_MS = 600  # Trailing silence that closes a segment
+MIN_SPEECH_MS = 150  # Voiced audio needed before a segment is sent to recognition
+ENERGY_RATIO = 3.0  # Frame RMS must exceed noise floor * ratio to count as voiced
+MIN_ENERGY = 100.0  # Absolute RMS floor for int16 audio, keeps dead-silent rooms gated
+NOISE_ADAPT = 0.05  # EMA weight for noise floor updates on unvoiced frames
+
+
+class MicrophoneSource:
+    """Reads raw 16-bit PCM frames from a microphone, kept open between phrases."""
+
+    def __init__(self, device_index=None, sample_rate=16000):
+        self.microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate)
+        self.source = None
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+
+    def open(self):
+        self.source = self.microphone.__enter__()
+        self.sample_rate = self.source.SAMPLE_RATE
+        self.sample_width = self.source.SAMPLE_WIDTH
+
+    def read(self, num_samples):
+        return self.source.stream.read(num_samples)
+
+    def close(self):
+        if self.source is not None:
+            self.microphone.__exit__(None, None, None)
+            self.source = None
+
+
+class WavSource:
+    """Reads frames from a mono 16-bit WAV file so the front end can run without a microphone."""
+
+    def __init__(self, path):
+        self.path = path
+        self.wav = None
+        self.sample_rate = None
+        self.sample_width = None
+
+    def open(self):
+        self.wav = wave.open(self.path, "rb")
+        if self.wav.getnchannels() != 1 or self.wav.getsampwidth() != 2:
+            self.wav.close()
+            raise ValueError(f"{self.path}: expected mono 16-bit PCM audio")
+        self.sample_rate = self.wav.getframerate()
+        self.sample_width = self.wav.getsampwidth()
+
+    def read(self, num_samples):
+        data = self.wav.readframes(num_samples)
+        if len(data) < num_samples * self.sample_width:
+            raise EOFError(self.path)
+        return data
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+
+
+class AudioFrontEnd:
+    """Gates captured audio locally so only likely speech reaches recognize_google.
+
+    Frames are read continuously into a pre-roll ring buffer. A segment starts on
+    the first voiced frame (RMS above an adaptive noise floor, confirmed by
+    webrtcvad when available), includes the pre-roll, and ends after HANGOVER_MS
+    of silence or at phrase_time_limit. Segments with too little voiced audio are
+    dropped without ever leaving the device.
+    """
+
+    def __init__(self, source, frame_ms=FRAME_MS, pre_roll_ms=PRE_ROLL_MS,
+                 hangover_ms=HANGOVER_MS, min_speech_ms=MIN_SPEECH_MS,
+                 energy_ratio=ENERGY_RATIO, vad_mode=2):
+        self.source = source
+        self.frame_ms = frame_ms
+        self.pre_roll_frames = max(1, pre_roll_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.energy_ratio = energy_ratio
+        self.vad_mode = vad_mode
+        self.vad = None
+        self.noise_floor = None
+        self.frame_samples = None
+        self.ring = None
+        self.running = False
+
+        # Counters for comparing recognition calls against raw audio time
+        self.frames_read = 0
+        self.segments_emitted = 0
+        self.segments_rejected = 0
+
+    def start(self, calibrate_s=0.5):
+        """Open the source and estimate the ambient noise floor."""
+        self.source.open()
+        self.frame_samples = self.source.sample_rate * self.frame_ms // 1000
+        self.ring = collections.deque(maxlen=self.pre_roll_frames)
+        if webrtcvad is not None and self.source.sample_rate in (8000, 16000, 32000, 48000):
+            self.vad = webrtcvad.Vad(self.vad_mode)
+        self.running = True
+        if calibrate_s:
+            self.calibrate(calibrate_s)
+
+    def stop(self):
+        self.running = False
+        self.source.close()
+
+    def calibrate(self, duration_s):
+        """Set the noise floor from the median energy of duration_s of background audio."""
+        energies = [self._energy(self._read_frame())
+                    for _ in range(max(1, int(duration_s * 1000) // self.frame_ms))]
+        self.noise_floor = float(np.median(energies))
+
+    def _read_frame(self):
+        self.frames_read += 1
+        return self.source.read(self.frame_samples)
+
+    @staticmethod
+    def _energy(frame):
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples))) if samples.size else 0.0
+
+    def is_speech(self, frame):
+        """Classify one frame and adapt the noise floor on frames judged silent."""
+        energy = self._energy(frame)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        voiced = energy > max(self.noise_floor * self.energy_ratio, MIN_ENERGY)
+        if voiced and self.vad is not None:
+            voiced = self.vad.is_speech(frame, self.source.sample_rate)
+        if not voiced:
+            self.noise_floor += NOISE_ADAPT * (energy - self.noise_floor)
+        return voiced
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        """Block until a speech segment is captured and return it as sr.AudioData.
+
+        Mirrors Recognizer.listen: raises sr.WaitTimeoutError if no speech starts
+        within timeout seconds of audio. Raises EOFError when a file source runs out.
+        """
+        if not self.running:
+            self.start()
+
+        waited_frames = 0
+        timeout_frames = None if timeout is None else int(timeout * 1000) // self.frame_ms
+        limit_frames = None if phrase_time_limit is None else int(phrase_time_limit * 1000) // self.frame_ms
+
+        while True:
+            # Wait for onset, keeping the most recent frames as pre-roll
+            while True:
+                frame = self._read_frame()
+                if self.is_speech(frame):
+                    break
+                self.ring.append(frame)
+                waited_frames += 1
+                if timeout_frames is not None and waited_frames >= timeout_frames:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+            segment = list(self.ring)
+            self.ring.clear()
+            segment.append(frame)
+            voiced_frames, silent_run, phrase_frames = 1, 0, 1
+            try:
+                while silent_run < self.hangover_frames:
+                    if limit_frames is not None and phrase_frames >= limit_frames:
+                        break
+                    frame = self._read_frame()
+                    segment.append(frame)
+                    phrase_frames += 1
+                    if self.is_speech(frame):
+                        voiced_frames += 1
+                        silent_run = 0
+                    else:
+                        silent_run += 1
+            except EOFError:
+                if voiced_frames < self.min_speech_frames:
+                    raise
+
+            if voiced_frames >= self.min_speech_frames:
+                self.segments_emitted += 1
+                return sr.AudioData(b"".join(segment), self.source.sample_rate, self.source.sample_width)
+
+            # Too short to be a word (click, cough, door): keep its tail as pre-roll and go on
+            self.segments_rejected += 1
+            self.ring.extend(segment[-self.pre_roll_frames:])
+            waited_frames += phrase_frames
+
+    def listen_once(self, timeout=None, phrase_time_limit=None, calibrate_s=0.5):
+        """Open the source, capture one phrase with listen() and close the source again.
+
+        For turn-based callers that speak between phrases: nothing is buffered while
+        the source is closed, so TTS playback is never picked up as the next phrase.
+        The noise floor is calibrated on the first call only.
+        """
+        self.start(calibrate_s=calibrate_s if self.noise_floor is None else 0)
+        try:
+            return self.listen(timeout=timeout, phrase_time_limit=phrase_time_limit)
+        finally:
+            self.stop()
+
+    def segments(self, phrase_time_limit=None):
+        """Yield every speech segment until the source is exhausted."""
+        while True:
+            try:
+                yield self.listen(phrase_time_limit=phrase_time_limit)
+            except EOFError:
+                return
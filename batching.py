@@ -0,0 +1,71 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+MAX_BATCH = 8  # Largest batch handed to a model in one call
+MAX_WAIT_S = 0.01  # Longest a request waits for companions once the first one arrives
+
+
+class DynamicBatcher:
+    """Collects single-item requests from many threads into batched model calls.
+
+    A worker thread waits for the first pending request, then keeps gathering
+    until it has max_batch items or max_wait_s has passed, calls
+    process_batch(items) once and resolves each caller's Future with its own
+    element of the returned list. Under light load a request waits at most
+    max_wait_s; under heavy load batches fill up and throughput rises.
+    """
+
+    def __init__(self, process_batch, max_batch=MAX_BATCH, max_wait_s=MAX_WAIT_S, name="batcher"):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self.requests.put((item, future))
+        return future
+
+    def __call__(self, item):
+        """Blocking single-item call."""
+        return self.submit(item).result()
+
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                outputs = self.process_batch(items)
+                if len(outputs) != len(items):
+                    raise RuntimeError(f"batch of {len(items)} returned {len(outputs)} results")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
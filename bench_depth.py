@@ -0,0 +1,59 @@
+import argparse
+import time
+
+import numpy as np
+
+from proximity import DepthPostProcessor, adaptive_threshold, normalize_depth, smooth_depth
+
+
+def legacy(depth_array):
+    depth_array = normalize_depth(depth_array)
+    depth_array = smooth_depth(depth_array)
+    return depth_array, adaptive_threshold(depth_array)
+
+
+def time_it(func, depth_array, repeats):
+    func(depth_array)  # Warm up allocations and OpenCV dispatch
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func(depth_array)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy depth post-processing chain with DepthPostProcessor.")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--dtype", choices=["uint8", "float32"], default="uint8",
+                        help="uint8 matches the pipeline's PIL depth image, float32 its predicted_depth tensor")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Smooth gradient plus noise, roughly the structure of a real depth map
+    ramp = np.linspace(0, 1, args.width)[None, :] * np.linspace(0.2, 1, args.height)[:, None]
+    depth_array = (ramp * 200 + rng.normal(0, 8, (args.height, args.width))).clip(0, 255).astype(args.dtype)
+
+    expected, expected_thresh = legacy(depth_array)
+    fused = DepthPostProcessor()
+    result = fused.process(depth_array)
+    print(f"max abs pixel difference: {np.abs(result.astype(int) - expected.astype(int)).max()}, "
+          f"threshold {expected_thresh:.3f} vs {fused.adaptive_threshold():.3f}")
+
+    legacy_ms = time_it(legacy, depth_array, args.repeats)
+    print(f"legacy (normalize + smooth + mean/std): {legacy_ms:.3f} ms")
+
+    def run_fused(arr, processor=fused):
+        processor.process(arr)
+        return processor.adaptive_threshold()
+
+    fused_ms = time_it(run_fused, depth_array, args.repeats)
+    print(f"fused:                                 {fused_ms:.3f} ms  ({legacy_ms / fused_ms:.2f}x)")
+
+    half = DepthPostProcessor(scale=0.5)
+    half_ms = time_it(lambda arr: (half.process(arr), half.adaptive_threshold()), depth_array, args.repeats)
+    print(f"fused at 0.5 scale:                    {half_ms:.3f} ms  ({legacy_ms / half_ms:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
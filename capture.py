@@ -0,0 +1,111 @@
+import queue
+import threading
+
+import cv2
+
+PREFETCH = 8  # Decoded frames buffered ahead of the consumer for file sources
+
+
+def is_live_source(source):
+    """Camera indices, device nodes and network streams are live; anything else is a file."""
+    if isinstance(source, int) or str(source).isdigit():
+        return True
+    return str(source).startswith(("/dev/video", "rtsp://", "rtmp://", "http://", "https://"))
+
+
+class FrameReader:
+    """Decodes frames on its own thread, replacing cap.read() in the frame loop.
+
+    Frames the consumer will not use are only grab()bed, never retrieve()d, so
+    they are not decoded or colour-converted. For live sources the thread keeps
+    grabbing to drain the driver buffer and decodes only when the consumer asks,
+    so read() always returns the most recent frame. For files it decodes every
+    skip-th frame ahead into a bounded queue.
+    """
+
+    def __init__(self, source, skip=1, live=None, prefetch=PREFETCH):
+        self.source = int(source) if str(source).isdigit() else source
+        self.live = is_live_source(source) if live is None else live
+        self.skip = max(1, skip)
+        self.cap = cv2.VideoCapture(self.source)
+        self.frames = queue.Queue(maxsize=prefetch)
+        self.condition = threading.Condition()
+        self.latest = None
+        self.waiting = False
+        self.finished = False
+        self.stopped = False
+
+        # Counters for checking how much decoding was avoided
+        self.grabbed = 0
+        self.decoded = 0
+
+        target = self._run_live if self.live else self._run_file
+        self.thread = threading.Thread(target=target, name="frame-reader", daemon=True)
+        self.thread.start()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _put(self, item):
+        while not self.stopped:
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _run_file(self):
+        index = 0
+        while not self.stopped and self.cap.grab():
+            self.grabbed += 1
+            if index % self.skip == 0:
+                ok, frame = self.cap.retrieve()
+                if not ok:
+                    break
+                self.decoded += 1
+                self._put((index, frame))
+            index += 1
+        self._put(None)
+
+    def _run_live(self):
+        index = 0
+        while not self.stopped and self.cap.grab():
+            self.grabbed += 1
+            index += 1
+            with self.condition:
+                if not self.waiting:
+                    continue
+            ok, frame = self.cap.retrieve()
+            if not ok:
+                break
+            self.decoded += 1
+            with self.condition:
+                self.latest = (index, frame)
+                self.waiting = False
+                self.condition.notify_all()
+        with self.condition:
+            self.finished = True
+            self.condition.notify_all()
+
+    def read(self):
+        """Return (frame_index, frame), or (None, None) once the source is exhausted."""
+        if self.finished and self.latest is None:
+            return None, None
+        if not self.live:
+            item = self.frames.get()
+            if item is None:
+                self.finished = True
+                return None, None
+            return item
+
+        with self.condition:
+            self.latest = None
+            self.waiting = True
+            self.condition.wait_for(lambda: self.latest is not None or self.finished)
+            item, self.latest = self.latest, None
+        return item if item is not None else (None, None)
+
+    def release(self):
+        self.stopped = True
+        self.thread.join(timeout=1)
+        self.cap.release()
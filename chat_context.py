@@ -0,0 +1,176 @@
+import datetime
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUDGET = 2000  # Tokens of history (summary + recent turns) sent with each message
+SUMMARY_BUDGET = 300  # Rolling summary is kept under this many tokens
+MIN_RECENT_TURNS = 4  # Always send at least this many recent turns
+MIN_SUMMARY_TOKENS = 400  # Folded text is summarized by the model only once it reaches this size
+CHARS_PER_TOKEN = 4  # Rough estimate, avoids a count_tokens round trip per turn
+
+# Queries whose answer does not depend on the conversation, with how long an answer stays valid
+CACHEABLE_QUERIES = [
+    (re.compile(r"^(what can you do|what are you able to do|help|how do i use (you|this))$"), 24 * 3600),
+    (re.compile(r"^(who|what) are you$"), 24 * 3600),
+    (re.compile(r"^(what is|what's) your name$"), 24 * 3600),
+]
+# Words that tie a query to earlier turns, so it must never be served from cache
+CONTEXT_WORDS = re.compile(r"\b(it|that|this|those|these|he|she|they|them|again|more|previous|above|earlier)\b")
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def normalize_query(text):
+    return re.sub(r"[^a-z0-9' ]+", "", text.lower()).strip()
+
+
+def local_answer(text):
+    """Answer clock questions on the device; the model does not know the local time anyway."""
+    query = normalize_query(text)
+    now = datetime.datetime.now()
+    if re.fullmatch(r"(what time is it|what's the time|what is the time)( now)?", query):
+        return f"It is {now.strftime('%I:%M %p').lstrip('0')}."
+    if re.fullmatch(r"(what day is it|what's the date|what is the date|what's today's date|what is today's date)( today)?", query):
+        return f"Today is {now.strftime('%A, %B %d, %Y')}."
+    return None
+
+
+class ResponseCache:
+    """TTL cache for idempotent, non-contextual queries such as 'what can you do'."""
+
+    def __init__(self, patterns=CACHEABLE_QUERIES):
+        self.patterns = patterns
+        self.entries = {}
+        self.hits = 0
+
+    def _ttl(self, query):
+        if CONTEXT_WORDS.search(query):
+            return None
+        for pattern, ttl in self.patterns:
+            if pattern.match(query):
+                return ttl
+        return None
+
+    def get(self, text):
+        query = normalize_query(text)
+        entry = self.entries.get(query)
+        if entry is None:
+            return None
+        response, expires = entry
+        if time.time() > expires:
+            del self.entries[query]
+            return None
+        self.hits += 1
+        return response
+
+    def put(self, text, response):
+        query = normalize_query(text)
+        ttl = self._ttl(query)
+        if ttl is not None:
+            self.entries[query] = (response, time.time() + ttl)
+
+
+class ConversationContext:
+    """Bounded chat history: recent turns plus a rolling summary of older ones.
+
+    Replaces ChatSession, which resends the whole history every turn. Each stored
+    turn is clipped so the min_recent_turns most recent ones fit in half the
+    budget. When the history exceeds token_budget, the oldest turns are folded
+    out down to half the budget. Folded text is sent truncated until enough has
+    built up to be worth a summary request, which then runs on a background
+    thread, so replies never wait for it.
+    """
+
+    def __init__(self, model, token_budget=TOKEN_BUDGET, summary_budget=SUMMARY_BUDGET,
+                 min_recent_turns=MIN_RECENT_TURNS, min_summary_tokens=MIN_SUMMARY_TOKENS, greeting=None):
+        self.model = model
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.min_recent_turns = min_recent_turns
+        self.min_summary_tokens = min_summary_tokens
+        self.turn_budget = max(1, (token_budget // 2 - summary_budget) // min_recent_turns)
+        self.summary = ""
+        self.pending = []  # Folded (role, text) turns not yet merged into the summary
+        self.summarizing = False
+        self.lock = threading.Lock()
+        self.turns = [(role, self._clip(text)) for role, text in greeting or []]  # role "user" or "model"
+
+    def _clip(self, text):
+        max_chars = self.turn_budget * CHARS_PER_TOKEN
+        return text if len(text) <= max_chars else text[:max_chars - 4] + " ..."
+
+    def _summary_text(self):
+        """The summary plus a truncated transcript of folded turns it does not cover yet."""
+        text = self.summary
+        if self.pending:
+            transcript = " ".join(f"{role}: {text}" for role, text in self.pending)
+            text = f"{text} Earlier: {transcript}".strip()
+        return text[-self.summary_budget * CHARS_PER_TOKEN:]
+
+    def history_tokens(self):
+        with self.lock:
+            summary = self._summary_text()
+            turns = list(self.turns)
+        return (estimate_tokens(summary) if summary else 0) + sum(estimate_tokens(text) for _, text in turns)
+
+    def contents(self, user_input):
+        """Request contents for generate_content: summary, recent turns, then the new message."""
+        contents = []
+        with self.lock:
+            summary = self._summary_text()
+            turns = list(self.turns)
+        if summary:
+            contents.append({"role": "user", "parts": [{"text": f"Summary of our conversation so far: {summary}"}]})
+            contents.append({"role": "model", "parts": [{"text": "Understood."}]})
+        for role, text in turns:
+            contents.append({"role": role, "parts": [{"text": text}]})
+        contents.append({"role": "user", "parts": [{"text": user_input}]})
+        return contents
+
+    def add_exchange(self, user_input, response_text):
+        with self.lock:
+            self.turns.append(("user", self._clip(user_input)))
+            self.turns.append(("model", self._clip(response_text)))
+        self._compact()
+
+    def _compact(self):
+        if self.history_tokens() <= self.token_budget:
+            return
+        # Fold the oldest turns (in user/model pairs) down to half the budget, so
+        # folding happens every few turns rather than on every turn
+        with self.lock:
+            while len(self.turns) > self.min_recent_turns and \
+                    sum(estimate_tokens(text) for _, text in self.turns) > self.token_budget // 2 - self.summary_budget:
+                self.pending.extend(self.turns[:2])
+                self.turns = self.turns[2:]
+            pending_tokens = sum(estimate_tokens(text) for _, text in self.pending)
+            if self.summarizing or pending_tokens < self.min_summary_tokens:
+                return
+            self.summarizing = True
+            folded, summary = list(self.pending), self.summary
+        threading.Thread(target=self._summarize, args=(folded, summary), daemon=True).start()
+
+    def _summarize(self, folded, summary):
+        transcript = "\n".join(f"{role}: {text}" for role, text in folded)
+        max_chars = self.summary_budget * CHARS_PER_TOKEN
+        try:
+            response = self.model.generate_content(
+                "Update this conversation summary with the new exchanges. Keep names, facts and open "
+                f"requests; stay under {self.summary_budget // 2} words.\n\n"
+                f"Summary: {summary or '(none)'}\n\nNew exchanges:\n{transcript}",
+                generation_config={"max_output_tokens": self.summary_budget})
+            summary = response.text.strip()
+        except Exception as e:
+            logger.warning(f"Summary failed, truncating instead: {str(e)}")
+            summary = f"{summary} {transcript}".strip()
+            summary = summary[-max_chars:]
+        with self.lock:
+            self.summary = summary[:max_chars]
+            self.pending = self.pending[len(folded):]
+            self.summarizing = False
@@ -0,0 +1,171 @@
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from pipeline import Stage
+from proximity import (DETECTION_THRESHOLD, HAZARD_THRESHOLD, DepthPostProcessor, ProximityAlerts,
+                       check_track_proximity, detections_from_xyxy, object_thresholds, warning_message)
+from recording import Recorder
+from tracker import Sort
+
+FRAME_SKIP = 3  # Run the detector every 3rd frame; tracks give per-frame proximity in between
+
+
+def track_labels(tracks, close_tracks=(), min_conf=0.0):
+    """(box, label, close) tuples for drawing; small enough to send to another process.
+
+    Tracks under min_conf are left out unless they are close, so every warned-about
+    object is still shown.
+    """
+    close_ids = {t.id for t in close_tracks}
+    return [(tuple(map(int, track.box)), f"{track.name} #{track.id}: {track.conf:.2f}", track.id in close_ids)
+            for track in tracks if track.conf >= min_conf or track.id in close_ids]
+
+
+def draw_tracks(frame, labelled_boxes, close_names=()):
+    """Draw track boxes (close ones in red) and a warning banner naming the close objects."""
+    for (x1, y1, x2, y2), label, close in labelled_boxes:
+        color = (0, 0, 255) if close else (0, 255, 0)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+
+    if close_names:
+        cv2.putText(frame, warning_message(sorted(close_names)), (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+
+
+class VisionStages:
+    """The video loop's stages, declared for pipeline.Scheduler.
+
+    Board values: frame_index/frame (every tick), detections, hazards and results
+    (YOLO), depth (post-processed depth array), tracks (every tick, predicted
+    between detector runs), close_tracks. Detections at or above
+    detection_threshold are drawn and published; tracking and proximity see
+    everything at or above HAZARD_THRESHOLD, so a less certain obstacle is still
+    announced. Model access goes through tier_models/quality
+    (see quality.py), so the soak harness can run the same stages with stub
+    models. publish(frame, detections, close_names) is called with the clean
+    frame whenever detections change; speak(text) once per track when it
+    becomes close.
+    """
+
+    def __init__(self, tier_models, quality, object_memory=None, publish=None, speak=None,
+                 detect_every=FRAME_SKIP, depth_every=None, depth_scale=1.0, record_path=None,
+                 detection_threshold=DETECTION_THRESHOLD):
+        self.tier_models = tier_models
+        self.quality = quality
+        self.object_memory = object_memory
+        self.publish = publish
+        self.speak = speak
+        self.detect_every = detect_every
+        self.depth_every = depth_every or detect_every
+        self.depth_scale = depth_scale
+        self.record_path = record_path
+        self.detection_threshold = detection_threshold
+
+        self.tracker = Sort(max_age=3 * detect_every)
+        self.depth_processor = DepthPostProcessor(scale=depth_scale)
+        self.depth_ms = 0.0
+        self.last_detections = None
+        self.alerts = ProximityAlerts()
+        self.recorder = None
+
+    def get_threshold(self, obj):
+        return object_thresholds.get(obj, 20)
+
+    def capture_stage(self, read):
+        """read() returns (frame_index, frame), or (None, None) once the source is exhausted."""
+        def capture():
+            frame_index, frame = read()
+            if frame is None:
+                raise StopIteration
+            return {"frame_index": frame_index, "frame": frame}
+        return Stage("capture", capture, outputs=["frame_index", "frame"], critical=True)
+
+    def detect(self, frame):
+        tier = self.quality.tier
+        yolo_model = self.tier_models.yolo(tier)  # Loaded before timing so a tier switch isn't counted
+        start = time.perf_counter()
+        results = yolo_model(frame)
+        if self.tier_models.loaded(tier):
+            # The tier budget covers both models, so charge the latest depth run alongside YOLO.
+            # A stand-in model's latency says nothing about the tier, so it is not recorded.
+            self.quality.record((time.perf_counter() - start) * 1000 + self.depth_ms)
+        hazards = detections_from_xyxy(results.xyxy[0], results.names, HAZARD_THRESHOLD)
+        detections = [d for d in hazards if d[4] >= self.detection_threshold]
+        return {"detections": detections, "hazards": hazards, "results": results}
+
+    def depth(self, frame):
+        start = time.perf_counter()
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        depth_map = self.tier_models.depth(self.quality.tier)(image)["depth"]
+        depth_array = self.depth_processor.process(np.array(depth_map))
+        self.depth_ms = (time.perf_counter() - start) * 1000
+        return {"depth": depth_array}
+
+    def record(self, frame_index, frame, results, depth):
+        if self.recorder is None:
+            self.recorder = Recorder(self.record_path, results.names, detect_every=self.detect_every)
+        self.recorder.add(frame_index, time.time(), depth, results.xyxy[0], frame.shape)
+
+    def track(self, hazards):
+        if hazards is not self.last_detections:
+            self.last_detections = hazards
+            return {"tracks": self.tracker.update(hazards)}
+        # Between detector runs, advance tracks with their Kalman prediction
+        return {"tracks": self.tracker.predict()}
+
+    def proximity(self, tracks, depth):
+        close_tracks = check_track_proximity(depth, tracks, self.get_threshold,
+                                             adaptive_thresh=self.depth_processor.adaptive_threshold(),
+                                             scale=self.depth_scale)
+        return {"close_tracks": close_tracks}
+
+    def alert(self, close_tracks):
+        new_alerts = self.alerts.update(close_tracks)
+        if new_alerts and self.speak is not None:
+            message = warning_message(new_alerts)
+            print(message)
+            self.speak(message)
+
+    def publish_detections(self, frame, detections, close_tracks, depth):
+        # Runs before rendering so commands see the clean frame
+        if self.object_memory is not None:
+            self.object_memory.record(detections, depth, frame.shape, depth_scale=self.depth_scale)
+        if self.publish is not None:
+            self.publish(frame.copy(), detections, [t.name for t in close_tracks])
+
+    def render(self, frame, tracks, close_tracks):
+        draw_tracks(frame, track_labels(tracks, close_tracks, self.detection_threshold),
+                    {t.name for t in close_tracks})
+
+    def analysis_stages(self, capture):
+        """Stages from the capture stage through alerts and publishing."""
+        stages = [
+            capture,
+            Stage("detect", self.detect, inputs=["frame"], outputs=["detections", "hazards", "results"],
+                  every=self.detect_every, critical=True),
+            Stage("depth", self.depth, inputs=["frame"], outputs=["depth"],
+                  every=self.depth_every, critical=True),
+            Stage("track", self.track, inputs=["hazards"], outputs=["tracks"], critical=True),
+            Stage("proximity", self.proximity, inputs=["tracks", "depth"], outputs=["close_tracks"],
+                  critical=True),
+            Stage("alert", self.alert, inputs=["close_tracks"], critical=True),
+            # Critical so it runs in the detector's tick: a deferred run would pair
+            # the detections with a later frame
+            Stage("publish", self.publish_detections, inputs=["frame", "detections", "close_tracks", "depth"],
+                  on_change=["detections"], critical=True),
+        ]
+        if self.record_path:
+            stages.append(Stage("record", self.record, inputs=["frame_index", "frame", "results", "depth"],
+                                on_change=["results"], critical=True))
+        return stages
+
+    def render_stage(self):
+        return Stage("render", self.render, inputs=["frame", "tracks", "close_tracks"], critical=True)
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
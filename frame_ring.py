@@ -0,0 +1,97 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+SLOTS = 8  # Frames kept in the ring; readers that fall further behind than this skip ahead
+POLL_S = 0.002  # Sleep between checks while waiting for a newer frame
+
+
+class FrameRing:
+    """Fixed-shape arrays passed between processes through one shared memory block.
+
+    A single writer fills slots round-robin and stamps each with a sequence
+    number; readers copy out the latest (or a given) sequence and re-check the
+    stamp afterwards, so a slot overwritten mid-copy is reported as missing
+    instead of returned torn. Each slot also carries an integer tag (the source
+    frame index). Only spec() - name, shape, dtype, slots - is sent to other
+    processes; they attach with FrameRing.attach(spec).
+    """
+
+    def __init__(self, shape, dtype=np.uint8, slots=SLOTS, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.owner = name is None
+        slot_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_bytes = (1 + 2 * slots) * 8
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * slot_bytes)
+        else:
+            # Child processes share the creator's resource tracker, so attaching
+            # does not make the block outlive or die with the child; the owner unlinks it
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        # Header: [latest sequence, slot sequences..., slot tags...]
+        header = np.ndarray((1 + 2 * slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.latest_seq = header[:1]
+        self.slot_seqs = header[1:1 + slots]
+        self.slot_tags = header[1 + slots:]
+        self.data = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=header_bytes)
+        if self.owner:
+            header[:] = 0
+            self.slot_seqs[:] = -1
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec["shape"], spec["dtype"], spec["slots"], name=spec["name"])
+
+    def spec(self):
+        return {"name": self.shm.name, "shape": self.shape, "dtype": self.dtype.str, "slots": self.slots}
+
+    def latest(self):
+        return int(self.latest_seq[0])
+
+    def write(self, array, tag=0):
+        """Copy array into the next slot and return its sequence number (starting at 1)."""
+        seq = self.latest() + 1
+        slot = seq % self.slots
+        self.slot_seqs[slot] = -1  # Readers treat the slot as missing while it is written
+        self.data[slot] = array
+        self.slot_tags[slot] = tag
+        self.slot_seqs[slot] = seq
+        self.latest_seq[0] = seq
+        return seq
+
+    def read(self, seq=None, out=None):
+        """Return (seq, tag, array copy) for seq (default: the latest), or None if it was overwritten."""
+        seq = self.latest() if seq is None else seq
+        if seq <= 0:
+            return None
+        slot = seq % self.slots
+        if self.slot_seqs[slot] != seq:
+            return None
+        tag = int(self.slot_tags[slot])
+        if out is None:
+            out = self.data[slot].copy()
+        else:
+            np.copyto(out, self.data[slot])
+        if self.slot_seqs[slot] != seq:
+            return None
+        return seq, tag, out
+
+    def wait_newer(self, after, stop=None, timeout=None):
+        """Block until a sequence newer than after is written; returns it, or None on stop/timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.latest() <= after:
+            if (stop is not None and stop.is_set()) or (deadline is not None and time.monotonic() > deadline):
+                return None
+            time.sleep(POLL_S)
+        return self.latest()
+
+    def close(self):
+        # Drop the views first; the mapping cannot be closed while arrays still export it
+        self.latest_seq = self.slot_seqs = self.slot_tags = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
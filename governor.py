@@ -0,0 +1,158 @@
+import argparse
+import itertools
+import json
+import os
+import statistics
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+PROFILE_PATH = "resource_profile.json"
+
+
+def default_profile(cores=None):
+    """Budget for a machine that has not been calibrated.
+
+    One core is left to the helper threads (speech recognition, TTS, commands),
+    PyTorch gets the rest for intra-op work, and OpenCV stays single-threaded so
+    its pool does not fight torch for the same cores.
+    """
+    cores = cores or os.cpu_count() or 1
+    inference_cores = max(1, cores - 1)
+    return {
+        "torch_threads": inference_cores,
+        "torch_interop_threads": 1,
+        "cv2_threads": 1,
+        "pool_workers": max(1, cores // 2),
+        "affinity": {
+            "inference": list(range(inference_cores)),
+            "helpers": list(range(inference_cores, cores)) or [0],
+        },
+    }
+
+
+def load_profile(path=PROFILE_PATH):
+    """Load a calibrated profile, falling back to default_profile()."""
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return default_profile()
+
+
+def save_profile(profile, path=PROFILE_PATH):
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+
+def apply_profile(profile):
+    """Apply thread budgets. Call before the models run their first inference."""
+    import torch
+    torch.set_num_threads(profile["torch_threads"])
+    try:
+        torch.set_num_interop_threads(profile["torch_interop_threads"])
+    except RuntimeError:
+        pass  # Only settable once, before any inter-op work has started
+    cv2.setNumThreads(profile["cv2_threads"])
+
+
+def pin_current_thread(profile, stage):
+    """Restrict the calling thread to the cores assigned to stage (Linux only, otherwise a no-op).
+
+    Threads started afterwards by this thread (e.g. torch's pool) inherit the mask.
+    """
+    cpus = profile.get("affinity", {}).get(stage)
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError as e:
+        print(f"Could not pin {stage} to CPUs {cpus}: {e}")
+
+
+def sample_frames(video_path, count):
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def measure(frames, near, face_cascade):
+    """Per-frame latency in ms of the app's per-frame work: depth, YOLO and a face scan."""
+    latencies = []
+    for frame in frames:
+        start = time.perf_counter()
+        image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        near.depth_estimator(image)
+        near.model(frame)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        face_cascade.detectMultiScale(cv2.resize(gray, None, fx=0.5, fy=0.5), scaleFactor=1.1, minNeighbors=5)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def calibrate(video_path=None, frames_per_config=20):
+    """Grid-search torch/OpenCV thread counts and return the profile with the lowest p95 latency."""
+    import torch
+    import near
+
+    cores = os.cpu_count() or 1
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    frames = sample_frames(video_path, frames_per_config)
+    measure(frames[:2], near, face_cascade)  # Warm up model weights and allocators
+
+    torch_options = sorted({1, 2, max(1, cores // 2), max(1, cores - 1), cores})
+    cv2_options = sorted({1, 2, max(1, cores // 2)})
+    best = None
+    for torch_threads, cv2_threads in itertools.product(torch_options, cv2_options):
+        profile = default_profile(cores)
+        profile["torch_threads"] = torch_threads
+        profile["cv2_threads"] = cv2_threads
+        profile["affinity"]["inference"] = list(range(min(cores, max(torch_threads, cv2_threads))))
+        profile["affinity"]["helpers"] = list(range(len(profile["affinity"]["inference"]), cores)) or [cores - 1]
+        torch.set_num_threads(torch_threads)
+        cv2.setNumThreads(cv2_threads)
+
+        latencies = sorted(measure(frames, near, face_cascade))
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        mean = statistics.mean(latencies)
+        print(f"torch {torch_threads:2d}  cv2 {cv2_threads:2d}: mean {mean:7.1f} ms  p95 {p95:7.1f} ms")
+        if best is None or p95 < best[0]:
+            profile["calibration"] = {"mean_ms": round(mean, 1), "p95_ms": round(p95, 1), "cores": cores}
+            best = (p95, profile)
+    return best[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or calibrate the CPU thread budget profile.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show = subparsers.add_parser("show", help="Print the profile that app.py would load")
+    show.add_argument("--profile", default=PROFILE_PATH)
+    cal = subparsers.add_parser("calibrate", help="Search thread budgets on this machine and save the best")
+    cal.add_argument("--video", default=None, help="Representative footage (random frames if omitted)")
+    cal.add_argument("--frames", type=int, default=20, help="Frames measured per configuration")
+    cal.add_argument("--profile", default=PROFILE_PATH)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        print(json.dumps(load_profile(args.profile), indent=2))
+        return
+
+    profile = calibrate(args.video, args.frames)
+    save_profile(profile, args.profile)
+    print(f"Saved {args.profile}: torch {profile['torch_threads']} threads, "
+          f"cv2 {profile['cv2_threads']} threads, p95 {profile['calibration']['p95_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import collections
+import json
+import math
+import threading
+import time
+
+EARTH_RADIUS_M = 6371000.0
+MAX_EXTRAPOLATION_S = 30.0  # Dead reckoning stops trusting velocity after this long without a fix
+MAX_SPEED_MPS = 15.0  # Velocity estimates above this are treated as jumps, not motion
+
+Fix = collections.namedtuple("Fix", ["latitude", "longitude", "timestamp"])
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlmb = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class LocationProvider:
+    """Source of raw position fixes. Subclasses implement read_fix()."""
+
+    interval_s = 1.0  # How often the background thread polls this provider
+
+    def read_fix(self):
+        """Return a Fix, or None if no new position is available."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class IPLocationProvider(LocationProvider):
+    """Coarse fix from IP geolocation; polled rarely because each poll is a network call."""
+
+    interval_s = 60.0
+
+    def read_fix(self):
+        import geocoder
+        location = geocoder.ip("me")
+        if not location.latlng:
+            return None
+        latitude, longitude = location.latlng
+        return Fix(latitude, longitude, time.time())
+
+
+def parse_nmea(sentence):
+    """Parse a $--RMC or $--GGA sentence into (latitude, longitude), or None."""
+    fields = sentence.strip().split("*")[0].split(",")
+    kind = fields[0][-3:]
+    try:
+        if kind == "RMC" and fields[2] == "A":
+            lat, lat_hemi, lon, lon_hemi = fields[3:7]
+        elif kind == "GGA" and fields[6] not in ("", "0"):
+            lat, lat_hemi, lon, lon_hemi = fields[2:6]
+        else:
+            return None
+        latitude = int(lat[:2]) + float(lat[2:]) / 60
+        longitude = int(lon[:3]) + float(lon[3:]) / 60
+    except (IndexError, ValueError):
+        return None
+    return (-latitude if lat_hemi == "S" else latitude, -longitude if lon_hemi == "W" else longitude)
+
+
+class NMEAProvider(LocationProvider):
+    """Fixes from a GPS receiver's NMEA stream, either a serial port (needs pyserial) or a log file."""
+
+    interval_s = 0.2
+
+    def __init__(self, path, baudrate=9600):
+        if path.startswith(("/dev/", "COM")):
+            import serial
+            self.stream = serial.Serial(path, baudrate, timeout=1)
+            self.binary = True
+        else:
+            self.stream = open(path)
+            self.binary = False
+
+    def read_fix(self):
+        while True:
+            line = self.stream.readline()
+            if not line:
+                return None
+            if self.binary:
+                line = line.decode("ascii", errors="ignore")
+            position = parse_nmea(line)
+            if position is not None:
+                return Fix(position[0], position[1], time.time())
+
+    def close(self):
+        self.stream.close()
+
+
+class ReplayLocationProvider(LocationProvider):
+    """Replays a JSONL track of {"t": seconds, "lat": ..., "lon": ...} in real time, for testing."""
+
+    interval_s = 0.2
+
+    def __init__(self, path, speed=1.0):
+        with open(path) as f:
+            self.points = [json.loads(line) for line in f if line.strip()]
+        self.speed = speed
+        self.start = None
+        self.next_index = 0
+
+    def read_fix(self):
+        if self.start is None:
+            self.start = time.time()
+        elapsed = (time.time() - self.start) * self.speed
+        fix = None
+        while self.next_index < len(self.points) and self.points[self.next_index]["t"] - self.points[0]["t"] <= elapsed:
+            point = self.points[self.next_index]
+            fix = Fix(point["lat"], point["lon"], time.time())
+            self.next_index += 1
+        return fix
+
+
+class AxisKalman:
+    """Constant-velocity Kalman filter for one coordinate (position in meters, velocity in m/s)."""
+
+    def __init__(self, position, measurement_var, accel_var=1.0):
+        self.x = [position, 0.0]
+        self.P = [[measurement_var, 0.0], [0.0, 25.0]]
+        self.measurement_var = measurement_var
+        self.accel_var = accel_var
+
+    def update(self, measurement, dt):
+        (p00, p01), (p10, p11) = self.P
+        q = self.accel_var
+        # Predict
+        x0 = self.x[0] + dt * self.x[1]
+        p00 = p00 + dt * (p01 + p10) + dt * dt * p11 + q * dt ** 4 / 4
+        p01 = p01 + dt * p11 + q * dt ** 3 / 2
+        p10 = p10 + dt * p11 + q * dt ** 3 / 2
+        p11 = p11 + q * dt * dt
+        # Correct
+        s = p00 + self.measurement_var
+        k0, k1 = p00 / s, p10 / s
+        innovation = measurement - x0
+        self.x = [x0 + k0 * innovation, self.x[1] + k1 * innovation]
+        self.P = [[(1 - k0) * p00, (1 - k0) * p01], [p10 - k1 * p00, p11 - k1 * p01]]
+
+
+class BackgroundLocator:
+    """Polls a LocationProvider on a daemon thread and publishes smoothed position and velocity.
+
+    Readers call current(), which never blocks on the provider: it takes the last
+    published estimate and extrapolates it with the estimated velocity for up to
+    MAX_EXTRAPOLATION_S. smoothing is "kalman" or "ema".
+    """
+
+    def __init__(self, provider, smoothing="kalman", measurement_std_m=None, ema_alpha=0.3):
+        self.provider = provider
+        self.smoothing = smoothing
+        # IP fixes are city-block accurate at best; GPS is a few meters
+        if measurement_std_m is None:
+            measurement_std_m = 500.0 if isinstance(provider, IPLocationProvider) else 5.0
+        self.measurement_std_m = measurement_std_m
+        self.measurement_var = measurement_std_m ** 2
+        self.ema_alpha = ema_alpha
+        self.origin = None
+        self.filters = None
+        self.estimate = None  # (latitude, longitude, v_north, v_east, timestamp), replaced as a whole
+        self.fixes = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="locator", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.provider.close()
+
+    def wait_for_fix(self, timeout=None):
+        """Block until the first fix arrives; used once at startup."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.estimate is None and (deadline is None or time.time() < deadline):
+            time.sleep(0.1)
+        return self.estimate is not None
+
+    def _to_local(self, latitude, longitude):
+        north = math.radians(latitude - self.origin[0]) * EARTH_RADIUS_M
+        east = math.radians(longitude - self.origin[1]) * EARTH_RADIUS_M * math.cos(math.radians(self.origin[0]))
+        return north, east
+
+    def _to_global(self, north, east):
+        latitude = self.origin[0] + math.degrees(north / EARTH_RADIUS_M)
+        longitude = self.origin[1] + math.degrees(east / (EARTH_RADIUS_M * math.cos(math.radians(self.origin[0]))))
+        return latitude, longitude
+
+    def _ingest(self, fix):
+        if self.origin is None:
+            self.origin = (fix.latitude, fix.longitude)
+            self.filters = [AxisKalman(0.0, self.measurement_var), AxisKalman(0.0, self.measurement_var)]
+            self.estimate = (fix.latitude, fix.longitude, 0.0, 0.0, fix.timestamp)
+            return
+
+        north, east = self._to_local(fix.latitude, fix.longitude)
+        last = self.estimate
+        dt = max(fix.timestamp - last[4], 1e-3)
+        if self.smoothing == "kalman":
+            self.filters[0].update(north, dt)
+            self.filters[1].update(east, dt)
+            (north, v_north), (east, v_east) = self.filters[0].x, self.filters[1].x
+        else:
+            last_north, last_east = self._to_local(last[0], last[1])
+            north = last_north + self.ema_alpha * (north - last_north)
+            east = last_east + self.ema_alpha * (east - last_east)
+            v_north = (1 - self.ema_alpha) * last[2] + self.ema_alpha * (north - last_north) / dt
+            v_east = (1 - self.ema_alpha) * last[3] + self.ema_alpha * (east - last_east) / dt
+
+        speed = math.hypot(v_north, v_east)
+        if speed > MAX_SPEED_MPS:
+            v_north, v_east = v_north * MAX_SPEED_MPS / speed, v_east * MAX_SPEED_MPS / speed
+        latitude, longitude = self._to_global(north, east)
+        self.estimate = (latitude, longitude, v_north, v_east, fix.timestamp)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                fix = self.provider.read_fix()
+                if fix is not None:
+                    self._ingest(fix)
+                    self.fixes += 1
+            except Exception as e:
+                print(f"Location error: {e}")
+            self.stop_event.wait(self.provider.interval_s)
+
+    def current(self, now=None):
+        """Latest (latitude, longitude), dead-reckoned to now; None before the first fix."""
+        estimate = self.estimate
+        if estimate is None:
+            return None
+        latitude, longitude, v_north, v_east, timestamp = estimate
+        now = time.time() if now is None else now
+        dt = min(max(now - timestamp, 0.0), MAX_EXTRAPOLATION_S)
+        if dt == 0.0 or (v_north == 0.0 and v_east == 0.0):
+            return latitude, longitude
+        north, east = self._to_local(latitude, longitude)
+        return self._to_global(north + v_north * dt, east + v_east * dt)
+
+
+def make_location_provider(source=None):
+    """None -> IP geolocation, *.jsonl -> replay, anything else -> NMEA file or serial port."""
+    if source is None:
+        return IPLocationProvider()
+    if source.endswith(".jsonl"):
+        return ReplayLocationProvider(source)
+    return NMEAProvider(source)
@@ -2,31 +2,41 @@ import pyttsx3
 import requests
 import threading
 import time
-import geocoder
 from queue import Queue
 from geopy.geocoders import Nominatim
 import re
 import speech_recognition as sr
+from audio_frontend import AudioFrontEnd, MicrophoneSource
+from location import BackgroundLocator, haversine_m, make_location_provider
 
 # Global speech queue
 speech_queue = Queue()
 recognizer = sr.Recognizer()
+voice_frontend = AudioFrontEnd(MicrophoneSource())
+
+LOCATION_SOURCE = None  # None for IP geolocation, or an NMEA log/serial port, or a .jsonl replay track
+ROUTE_REFRESH_S = 60  # Directions API is called at most this often
+GUIDANCE_INTERVAL_S = 10  # Local step guidance between route requests
+STEP_ARRIVAL_M = 20  # Within this distance of a step's end, move on to the next step
+OFF_ROUTE_M = 100  # Further than this beyond a step's length from its end forces a new route
+REROUTE_MIN_S = 30  # An off-route or empty route is re-requested no sooner than this after the last request
+MAX_STEP_STD_M = STEP_ARRIVAL_M  # Step progress and off-route checks need fixes at least this accurate
+locator = None
+
 def get_voice_input():
     """Get voice input from the user"""
-    with sr.Microphone() as source:
-        print("Listening for destination...")
-        audio = recognizer.listen(source)
-        time.sleep(5)
-        try:
-            text = recognizer.recognize_google(audio)
-            print(f"You said: {text}")
-            return text
-        except sr.UnknownValueError:
-            print("Sorry, I didn't understand that.")
-            return None
-        except sr.RequestError:
-            print("Sorry, there was an error with the speech recognition service.")
-            return None
+    print("Listening for destination...")
+    audio = voice_frontend.listen_once()
+    try:
+        text = recognizer.recognize_google(audio)
+        print(f"You said: {text}")
+        return text
+    except sr.UnknownValueError:
+        print("Sorry, I didn't understand that.")
+        return None
+    except sr.RequestError:
+        print("Sorry, there was an error with the speech recognition service.")
+        return None
         
 def speech_thread():
     """Thread to handle all text-to-speech operations"""
@@ -69,9 +79,11 @@ def speech_thread():
 
 
 def get_current_location():
-    """Get current location using geocoder"""
-    location = geocoder.ip("me")
-    latitude, longitude = location.latlng
+    """Get current location from the background locator, or None until it has a fix"""
+    location = locator.current() if locator is not None else None
+    if location is None:
+        return None
+    latitude, longitude = location
     print(f"Current Location: {latitude}, {longitude}")
     return latitude, longitude
 
@@ -102,38 +114,70 @@ def clean_html(text):
     """Remove HTML tags from text"""
     return re.sub('<.*?>', ' ', text).replace('  ', ' ').strip()
 
+def announce_step(step):
+    instruction = clean_html(step['html_instructions'])
+    print(1, instruction)
+    distance = step.get('distance', {}).get('text', 'Unknown distance')
+    speech_queue.put(f"{instruction}. You will need to travel {distance}.")
+
 def navigation_thread(destination_lat, destination_lon, stop_event):
     """Thread that handles navigation updates"""
+    steps = []
+    step_index = 0
+    route_time = None
+    off_route = False
+    # A coarse provider (IP geolocation is ~500 m) cannot tell a 20 m step arrival
+    # from noise, so it only gets the periodic route refresh
+    track_steps = locator.measurement_std_m <= MAX_STEP_STD_M
     while not stop_event.is_set():
         try:
-            current_lat, current_lon = get_current_location()
-            travel_time, directions = get_directions(current_lat, current_lon, destination_lat, destination_lon)
-            
-            # Queue travel time announcement
-            speech_queue.put(f"Your travel time will be {travel_time}.")
-            
-            # Wait before giving directions
-            time.sleep(3)
-            
-            # Only speak the first direction
-            if directions:
-                instruction = clean_html(directions[0]['html_instructions'])
-                print(1, instruction)
-                distance = directions[0].get('distance', {}).get('text', 'Unknown distance')
-                speech_queue.put(f"{instruction}. You will need to travel {distance}.")
-            
-            # Wait a minute before the next update
-            time.sleep(60)
-            
+            location = get_current_location()
+            if location is None:
+                # No fix yet; the locator keeps polling in the background
+                stop_event.wait(GUIDANCE_INTERVAL_S)
+                continue
+            current_lat, current_lon = location
+
+            since_route = None if route_time is None else time.time() - route_time
+            if since_route is None or since_route > ROUTE_REFRESH_S or \
+                    ((off_route or not steps) and since_route > REROUTE_MIN_S):
+                route_time = time.time()  # Set first so a failing request is not retried every loop
+                travel_time, steps = get_directions(current_lat, current_lon, destination_lat, destination_lon)
+                step_index = 0
+                off_route = False
+
+                # Queue travel time announcement, then only the first direction
+                speech_queue.put(f"Your travel time will be {travel_time}.")
+                if steps:
+                    announce_step(steps[0])
+            elif steps and not off_route and track_steps:
+                # Between route requests, follow progress along the steps locally
+                step = steps[step_index]
+                end = step['end_location']
+                remaining = haversine_m(current_lat, current_lon, end['lat'], end['lng'])
+                if remaining < STEP_ARRIVAL_M and step_index + 1 < len(steps):
+                    step_index += 1
+                    announce_step(steps[step_index])
+                elif remaining > step.get('distance', {}).get('value', 0) + OFF_ROUTE_M:
+                    # Re-routed once REROUTE_MIN_S has passed since the last request
+                    speech_queue.put("You seem to be off route. Recalculating.")
+                    off_route = True
+
+            stop_event.wait(GUIDANCE_INTERVAL_S)
+
         except Exception as e:
             print(f"Error in navigation: {e}")
             speech_queue.put("I encountered an error getting directions.")
             time.sleep(10)
 
 def main():
+    global locator
     # Start the speech thread first
     speech_thread_handle = threading.Thread(target=speech_thread, daemon=True)
     speech_thread_handle.start()
+
+    # Start polling location in the background so navigation never waits on it
+    locator = BackgroundLocator(make_location_provider(LOCATION_SOURCE)).start()
     
     print("GPS Navigation System")
     print("---------------------")
@@ -142,7 +186,6 @@ def main():
     destination_name = None
     while destination_name is None:
         destination_name = get_voice_input()
-        time.sleep(10)
         if destination_name is None:
             speech_queue.put("I didn't catch that. Please try again.")
     
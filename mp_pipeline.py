@@ -0,0 +1,269 @@
+import argparse
+import multiprocessing as mp
+import queue
+import time
+import warnings
+
+import cv2
+
+from frame_loop import FRAME_SKIP
+from frame_ring import FrameRing, SLOTS
+from pipeline import Stage, Scheduler
+
+warnings.filterwarnings("ignore")
+
+DEPTH_SLOTS = 4  # Depth maps kept in their ring
+OVERLAY_QUEUE = 4  # Analysis results buffered for the overlay process
+FACE_RATE_HZ = 2.0  # Face identification in the overlay process runs at most this often
+JOIN_TIMEOUT_S = 5.0  # Time given to each process to exit before it is terminated
+
+
+def probe_shape(source):
+    """Shape of the first frame of source, or None if it cannot be read."""
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    ok, frame = cap.read()
+    cap.release()
+    return frame.shape if ok else None
+
+
+def ring_capture_stage(ring, stop):
+    """A capture stage that hands over the newest frame in ring, waiting for one not yet seen."""
+    last = {"seq": 0}
+
+    def capture():
+        while True:
+            seq = ring.wait_newer(last["seq"], stop)
+            if seq is None:
+                raise StopIteration
+            item = ring.read(seq)
+            if item is not None:
+                last["seq"], frame_index, frame = item
+                return {"frame_index": frame_index, "frame": frame}
+
+    return Stage("capture", capture, outputs=["frame_index", "frame"], critical=True)
+
+
+def capture_process(source, frame_spec, stop, pace=True):
+    """Decode source into the frame ring. Files are paced to their frame rate, like a camera."""
+    from capture import FrameReader
+
+    frames = FrameRing.attach(frame_spec)
+    reader = FrameReader(source)
+    fps = reader.cap.get(cv2.CAP_PROP_FPS) if pace and not reader.live else 0
+    interval = 1.0 / fps if fps and fps > 0 else 0.0
+    next_time = time.monotonic()
+    try:
+        while not stop.is_set():
+            frame_index, frame = reader.read()
+            if frame is None:
+                break
+            if frame.shape != frames.shape:
+                frame = cv2.resize(frame, (frames.shape[1], frames.shape[0]))
+            frames.write(frame, tag=frame_index)
+            if interval:
+                next_time += interval
+                time.sleep(max(0.0, next_time - time.monotonic()))
+    finally:
+        stop.set()  # End of the source ends the pipeline
+        reader.release()
+        frames.close()
+
+
+def analysis_process(frame_spec, depth_spec, overlay_queue, speech_queue, stop, settings):
+    """Detection, depth, tracking, proximity and alerts on the newest frames."""
+    from governor import load_profile, apply_profile, pin_current_thread
+
+    # Thread budgets have to be in place before the models in near.py are loaded and run
+    profile = load_profile()
+    apply_profile(profile)
+
+    from near import depth_estimator, model as near_model
+    from frame_loop import VisionStages, track_labels
+    from quality import QualityController, TierModels
+
+    overlay_queue.cancel_join_thread()
+    speech_queue.cancel_join_thread()
+    frames = FrameRing.attach(frame_spec)
+    depths = FrameRing.attach(depth_spec)
+    quality = QualityController()
+    tier_models = TierModels(depth_estimator, {"yolov5s": near_model})
+    tier_models.preload(quality.tier)  # Neighbouring tiers load in the background while this one runs
+    vision = VisionStages(tier_models, quality,
+                          speak=speech_queue.put, detect_every=settings["detect_every"],
+                          depth_every=settings["depth_every"], depth_scale=settings["depth_scale"])
+
+    def share_depth(frame_index, depth):
+        if depth.shape != depths.shape:
+            depth = cv2.resize(depth, (depths.shape[1], depths.shape[0]))
+        depths.write(depth, tag=frame_index)
+
+    def share_tracks(frame_index, tracks, close_tracks):
+        result = {"frame_index": frame_index, "tracks": track_labels(tracks, close_tracks, vision.detection_threshold),
+                  "people": [tuple(map(int, t.box)) for t in tracks if t.name == "person"],
+                  "close": sorted({t.name for t in close_tracks}), "depth_seq": depths.latest()}
+        try:
+            overlay_queue.put_nowait(result)
+        except queue.Full:
+            pass  # The overlay only draws the newest result, so a dropped one is not missed
+
+    stages = vision.analysis_stages(ring_capture_stage(frames, stop)) + [
+        Stage("share_depth", share_depth, inputs=["frame_index", "depth"], on_change=["depth"], critical=True),
+        Stage("share_tracks", share_tracks, inputs=["frame_index", "tracks", "close_tracks"], critical=True),
+    ]
+    scheduler = Scheduler(stages)
+
+    pin_current_thread(profile, "inference")
+    try:
+        scheduler.run()
+    finally:
+        print(f"analysis: {scheduler.report()}")
+        vision.close()
+        frames.close()
+        depths.close()
+
+
+def overlay_process(frame_spec, depth_spec, overlay_queue, stop, settings):
+    """Face identification, drawing and display, on frames newer than the analysis if need be."""
+    import recognition
+    from frame_loop import draw_tracks
+
+    frames = FrameRing.attach(frame_spec)
+    depths = FrameRing.attach(depth_spec)
+
+    def receive():
+        # Drain to the newest analysis result; older ones are already stale
+        result = None
+        while True:
+            try:
+                result = overlay_queue.get_nowait()
+            except queue.Empty:
+                break
+        return None if result is None else {"analysis": result}
+
+    def faces(frame, analysis):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return {"faces": recognition.identify_faces(gray, analysis["people"])}
+
+    def render(frame, analysis):
+        draw_tracks(frame, analysis["tracks"], analysis["close"])
+
+    def show_depth(analysis):
+        item = depths.read(analysis["depth_seq"])
+        if item is not None:
+            cv2.imshow('Depth', cv2.applyColorMap(item[2], cv2.COLORMAP_INFERNO))
+
+    def display(frame):
+        cv2.imshow('Video', frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            stop.set()
+            raise StopIteration
+
+    stages = [
+        ring_capture_stage(frames, stop),
+        Stage("receive", receive, outputs=["analysis"], critical=True),
+        Stage("faces", faces, inputs=["frame", "analysis"], outputs=["faces"], rate_hz=settings["face_rate"]),
+        Stage("render", render, inputs=["frame", "analysis"], critical=True),
+        Stage("face_labels", recognition.draw_faces, inputs=["frame", "faces"], critical=True),
+    ]
+    if settings["show_depth"]:
+        stages.append(Stage("show_depth", show_depth, inputs=["analysis"], on_change=["analysis"]))
+    stages.append(Stage("display", display, inputs=["frame"], critical=True))
+    scheduler = Scheduler(stages, deadline_ms=settings["deadline_ms"])
+
+    try:
+        scheduler.run()
+    finally:
+        print(f"overlay: {scheduler.report()}")
+        cv2.destroyAllWindows()
+        frames.close()
+        depths.close()
+
+
+def speak_until_done(speech_queue, processes):
+    """Speak alerts from the analysis process until every stage process has exited."""
+    import pyttsx3
+
+    engine = pyttsx3.init()
+    while any(p.is_alive() for p in processes):
+        try:
+            text = speech_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            engine.say(text)
+            engine.runAndWait()
+        except Exception as e:
+            print(f"Speech Error: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run capture, detection/depth and face/overlay in separate processes, "
+                    "passing frames and depth maps through shared memory.")
+    parser.add_argument("source", help="Video file, camera index or stream URL")
+    parser.add_argument("--detect-every", type=int, default=FRAME_SKIP, help="Analysed frames per YOLO run")
+    parser.add_argument("--depth-every", type=int, default=None, help="Analysed frames per depth run")
+    parser.add_argument("--depth-scale", type=float, default=1.0)
+    parser.add_argument("--face-rate", type=float, default=FACE_RATE_HZ, help="Face identifications per second")
+    parser.add_argument("--deadline-ms", type=float, default=50.0, help="Overlay frame deadline")
+    parser.add_argument("--slots", type=int, default=SLOTS, help="Frames kept in the shared ring")
+    parser.add_argument("--no-display", action="store_true", help="Skip the face/overlay process")
+    parser.add_argument("--show-depth", action="store_true", help="Show the latest depth map too")
+    parser.add_argument("--no-pace", action="store_true", help="Read files as fast as they decode")
+    args = parser.parse_args()
+
+    shape = probe_shape(args.source)
+    if shape is None:
+        print(f"Could not read a frame from {args.source}")
+        return
+
+    # Same rounding as DepthPostProcessor, so depth maps fit the ring without resizing
+    height, width = shape[:2]
+    if args.depth_scale != 1.0:
+        height, width = max(1, round(height * args.depth_scale)), max(1, round(width * args.depth_scale))
+    frames = FrameRing(shape, slots=args.slots)
+    depths = FrameRing((height, width), slots=DEPTH_SLOTS)
+
+    settings = {
+        "detect_every": args.detect_every,
+        "depth_every": args.depth_every,
+        "depth_scale": args.depth_scale,
+        "face_rate": args.face_rate,
+        "deadline_ms": args.deadline_ms,
+        "show_depth": args.show_depth,
+    }
+    # Spawned children start clean instead of inheriting torch and capture threads
+    ctx = mp.get_context("spawn")
+    stop = ctx.Event()
+    overlay_queue = ctx.Queue(maxsize=OVERLAY_QUEUE)
+    speech_queue = ctx.Queue()
+
+    processes = [
+        ctx.Process(target=capture_process, name="capture",
+                    args=(args.source, frames.spec(), stop, not args.no_pace)),
+        ctx.Process(target=analysis_process, name="analysis",
+                    args=(frames.spec(), depths.spec(), overlay_queue, speech_queue, stop, settings)),
+    ]
+    if not args.no_display:
+        processes.append(ctx.Process(target=overlay_process, name="overlay",
+                                     args=(frames.spec(), depths.spec(), overlay_queue, stop, settings)))
+    for process in processes:
+        process.start()
+
+    try:
+        speak_until_done(speech_queue, processes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(JOIN_TIMEOUT_S)
+            if process.is_alive():
+                print(f"{process.name} did not exit, terminating")
+                process.terminate()
+        frames.close()
+        depths.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import argparse
+import threading
+import time
+import warnings
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from batching import DynamicBatcher
+from frame_loop import FRAME_SKIP, draw_tracks, track_labels
+from near import depth_estimator, model as near_model
+from proximity import (DETECTION_THRESHOLD, HAZARD_THRESHOLD, DepthPostProcessor, ProximityAlerts,
+                       check_track_proximity, detections_from_xyxy, object_thresholds, warning_message)
+from tracker import Sort
+
+warnings.filterwarnings("ignore")
+
+DEPTH_INPUT_SIZE = (640, 480)  # (width, height) every frame is resized to before a depth batch
+
+# Only the depth batcher's worker thread uses this, one map at a time
+depth_processor = DepthPostProcessor()
+
+
+def estimate_depth_batch(frames):
+    """Depth-Anything over a list of BGR frames -> normalized, smoothed uint8 maps.
+
+    The image processor keeps each frame's aspect ratio, so streams with different
+    resolutions would give tensors that cannot be stacked into one batch. Frames
+    are resized to DEPTH_INPUT_SIZE first and each map is resized back to its
+    frame's size, so box coordinates still index it directly.
+    """
+    images = [Image.fromarray(cv2.cvtColor(cv2.resize(frame, DEPTH_INPUT_SIZE, interpolation=cv2.INTER_AREA),
+                                           cv2.COLOR_BGR2RGB))
+              for frame in frames]
+    outputs = depth_estimator(images, batch_size=len(images))
+    depth_arrays = []
+    for frame, output in zip(frames, outputs):
+        depth_map = np.array(output["depth"])
+        if depth_map.shape != frame.shape[:2]:
+            depth_map = cv2.resize(depth_map, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_LINEAR)
+        # process() reuses its buffer, so keep a copy per stream
+        depth_arrays.append(depth_processor.process(depth_map).copy())
+    return depth_arrays
+
+
+def detect_batch(frames):
+    """YOLOv5 over a list of frames -> one detection list per frame."""
+    results = near_model(list(frames))
+    return [detections_from_xyxy(xyxy, results.names, HAZARD_THRESHOLD) for xyxy in results.xyxy]
+
+
+class StreamWorker(threading.Thread):
+    """Captures one source and keeps its own tracks, proximity state and latest view."""
+
+    def __init__(self, stream_id, source, depth_batcher, detect_batcher, frame_skip=FRAME_SKIP):
+        super().__init__(name=f"stream-{stream_id}", daemon=True)
+        self.stream_id = stream_id
+        self.source = source
+        self.depth_batcher = depth_batcher
+        self.detect_batcher = detect_batcher
+        self.frame_skip = frame_skip
+        self.tracker = Sort(max_age=3 * frame_skip)
+        self.latest_frame = None
+        self.frames = 0
+        self.analysed = 0
+        self.finished = False
+
+    def run(self):
+        cap = cv2.VideoCapture(int(self.source) if self.source.isdigit() else self.source)
+        depth_array = None
+        alerts = ProximityAlerts()
+
+        try:
+            while cap.isOpened():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames += 1
+
+                if self.frames % self.frame_skip == 0 or depth_array is None:
+                    # Submit both requests before waiting so they batch with other streams
+                    depth_future = self.depth_batcher.submit(frame)
+                    detect_future = self.detect_batcher.submit(frame)
+                    depth_array = depth_future.result()
+                    tracks = self.tracker.update(detect_future.result())
+                    self.analysed += 1
+                else:
+                    tracks = self.tracker.predict()
+
+                close_tracks = check_track_proximity(depth_array, tracks, lambda obj: object_thresholds.get(obj, 20))
+                new_alerts = alerts.update(close_tracks)
+                if new_alerts:
+                    print(f"[{self.stream_id}] {warning_message(new_alerts)}")
+
+                draw_tracks(frame, track_labels(tracks, close_tracks, DETECTION_THRESHOLD),
+                            {t.name for t in close_tracks})
+                self.latest_frame = frame
+        except Exception as e:
+            # Model errors come back through the futures; end this stream rather than leave main() waiting
+            print(f"[{self.stream_id}] Stream error: {e}")
+        finally:
+            cap.release()
+            self.finished = True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run VisionHelp over several video sources with one set of models. "
+                    "Depth and YOLOv5 requests from all streams are batched together.",
+        epilog="example: python multi_stream.py cam0.mp4 cam1.mp4 0 --max-batch 4 --display")
+    parser.add_argument("sources", nargs="+", help="Video files or camera indices")
+    parser.add_argument("--max-batch", type=int, default=None, help="Largest model batch (default: number of sources)")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="Longest wait for a batch to fill")
+    parser.add_argument("--frame-skip", type=int, default=FRAME_SKIP)
+    parser.add_argument("--display", action="store_true", help="Show one window per stream")
+    args = parser.parse_args()
+
+    max_batch = args.max_batch or len(args.sources)
+    depth_batcher = DynamicBatcher(estimate_depth_batch, max_batch, args.max_wait_ms / 1000, name="depth-batcher")
+    detect_batcher = DynamicBatcher(detect_batch, max_batch, args.max_wait_ms / 1000, name="yolo-batcher")
+
+    workers = [StreamWorker(str(i), source, depth_batcher, detect_batcher, args.frame_skip)
+               for i, source in enumerate(args.sources)]
+    for worker in workers:
+        worker.start()
+
+    start = time.time()
+    while not all(worker.finished for worker in workers):
+        if args.display:
+            # HighGUI must be driven from the main thread
+            for worker in workers:
+                if worker.latest_frame is not None:
+                    cv2.imshow(f"Stream {worker.stream_id}", worker.latest_frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+        else:
+            time.sleep(0.1)
+
+    elapsed = max(time.time() - start, 1e-9)
+    for worker in workers:
+        print(f"Stream {worker.stream_id}: {worker.frames} frames, {worker.analysed} analysed, "
+              f"{worker.frames / elapsed:.1f} FPS")
+    print(f"Mean batch size: depth {depth_batcher.mean_batch_size():.2f}, "
+          f"YOLO {detect_batcher.mean_batch_size():.2f}")
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
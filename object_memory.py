@@ -0,0 +1,85 @@
+import collections
+import threading
+import time
+
+from proximity import box_depth
+
+MAX_AGE_S = 30.0  # Sightings older than this are forgotten
+MAX_PER_CLASS = 16  # Most recent sightings kept per object class
+MAX_CLASSES = 80  # YOLOv5 COCO has 80 classes; caps the store for custom models
+
+Sighting = collections.namedtuple("Sighting", ["timestamp", "center_x", "center_y", "depth", "frame_width", "frame_height"])
+
+
+class ObjectMemory:
+    """Rolling, time-indexed memory of recent detections per object class.
+
+    Each class maps to a bounded deque ordered by time, so the freshest sighting
+    of any class is a dict lookup plus deque[-1]. Expired sightings are pruned
+    lazily on lookup and when a class is written.
+    """
+
+    def __init__(self, max_age_s=MAX_AGE_S, max_per_class=MAX_PER_CLASS, max_classes=MAX_CLASSES):
+        self.max_age_s = max_age_s
+        self.max_per_class = max_per_class
+        self.max_classes = max_classes
+        self.sightings = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def record(self, detections, depth_array, frame_shape, timestamp=None, depth_scale=1.0):
+        """Store (x1, y1, x2, y2, conf, name) detections seen in one frame.
+
+        depth_scale maps frame coordinates onto a downsampled depth_array.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        frame_height, frame_width = frame_shape[:2]
+        with self.lock:
+            for x1, y1, x2, y2, conf, name in detections:
+                depth = None if depth_array is None else box_depth(depth_array, (x1, y1, x2, y2), depth_scale)
+                history = self.sightings.get(name)
+                if history is None:
+                    history = collections.deque(maxlen=self.max_per_class)
+                    self.sightings[name] = history
+                    if len(self.sightings) > self.max_classes:
+                        self.sightings.popitem(last=False)
+                else:
+                    self.sightings.move_to_end(name)
+                    self._prune(history, timestamp)
+                history.append(Sighting(timestamp, (x1 + x2) / 2, (y1 + y2) / 2, depth,
+                                        frame_width, frame_height))
+
+    def _prune(self, history, now):
+        while history and now - history[0].timestamp > self.max_age_s:
+            history.popleft()
+
+    def latest(self, name, now=None):
+        """Return the freshest non-expired sighting of name, or None."""
+        now = time.time() if now is None else now
+        with self.lock:
+            history = self.sightings.get(name)
+            if not history:
+                return None
+            self._prune(history, now)
+            return history[-1] if history else None
+
+    def forget(self):
+        with self.lock:
+            self.sightings.clear()
+
+
+def horizontal_position(sighting):
+    """Coarse left/ahead/right from where the object sat in its frame."""
+    third = sighting.frame_width / 3
+    if sighting.center_x < third:
+        return "to your left"
+    if sighting.center_x > 2 * third:
+        return "to your right"
+    return "straight ahead"
+
+
+def describe_last_seen(name, sighting, now=None):
+    """Spoken answer for an object that is not in the current view."""
+    now = time.time() if now is None else now
+    seconds = max(1, int(round(now - sighting.timestamp)))
+    unit = "second" if seconds == 1 else "seconds"
+    return f"{name} last seen {horizontal_position(sighting)} {seconds} {unit} ago."
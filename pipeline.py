@@ -0,0 +1,142 @@
+import time
+
+EMA_ALPHA = 0.2  # Weight of the newest run in a stage's cost estimate
+MAX_DEFERRALS = 3  # A stage deferred this many ticks in a row runs regardless of the deadline
+
+
+class Stage:
+    """A declared pipeline step.
+
+    fn is called with the latest value of each name in inputs as keyword
+    arguments and returns a dict of outputs (or None to publish nothing).
+    A stage runs every `every` ticks, or at most rate_hz times per second, and
+    only once all of its inputs have been produced. With on_change set, it also
+    waits until one of those inputs has a value it has not seen yet. Critical
+    stages always run when due; the others are deferred to a later tick when
+    their estimated cost does not fit in what is left of the frame deadline,
+    but never more than MAX_DEFERRALS ticks in a row.
+    """
+
+    def __init__(self, name, fn, inputs=(), outputs=(), every=1, rate_hz=None,
+                 on_change=(), critical=False):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.every = every
+        self.rate_hz = rate_hz
+        self.on_change = tuple(on_change)
+        self.critical = critical
+
+        self.last_run = None
+        self.seen = {}
+        self.cost_ms = 0.0
+        self.runs = 0
+        self.deferred = 0
+        self.deferred_in_row = 0
+
+    def due(self, tick, now):
+        if self.rate_hz is not None:
+            return self.last_run is None or now - self.last_run >= 1.0 / self.rate_hz
+        return tick % self.every == 0
+
+
+def order_stages(stages):
+    """Order stages so producers run before consumers, keeping declaration order otherwise."""
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            producers[output] = stage
+    ordered, placed = [], set()
+
+    def place(stage, visiting):
+        if stage.name in placed:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Stage dependency cycle through {stage.name}")
+        visiting.add(stage.name)
+        for name in stage.inputs:
+            producer = producers.get(name)
+            if producer is not None and producer is not stage:
+                place(producer, visiting)
+        placed.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        place(stage, set())
+    return ordered
+
+
+class Scheduler:
+    """Runs declared stages at their own cadence over a shared board of latest values."""
+
+    def __init__(self, stages, deadline_ms=None, max_deferrals=MAX_DEFERRALS):
+        names = [stage.name for stage in stages]
+        if len(set(names)) != len(names):
+            raise ValueError("Stage names must be unique")
+        self.stages = order_stages(stages)
+        self.deadline_ms = deadline_ms
+        self.max_deferrals = max_deferrals
+        self.board = {}  # name -> (sequence, value)
+        self.sequence = 0
+        self.tick_count = 0
+        self.missed_deadlines = 0
+
+    def get(self, name, default=None):
+        entry = self.board.get(name)
+        return default if entry is None else entry[1]
+
+    def publish(self, name, value):
+        self.sequence += 1
+        self.board[name] = (self.sequence, value)
+
+    def _ready(self, stage):
+        if any(name not in self.board for name in stage.inputs):
+            return False
+        if stage.on_change:
+            return any(self.board[name][0] != stage.seen.get(name) for name in stage.on_change if name in self.board)
+        return True
+
+    def tick(self):
+        """Run one frame's worth of due stages. Returns False once a stage raises StopIteration."""
+        start = time.perf_counter()
+        now = time.monotonic()
+        for stage in self.stages:
+            if not stage.due(self.tick_count, now) or not self._ready(stage):
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if (self.deadline_ms is not None and not stage.critical
+                    and stage.deferred_in_row < self.max_deferrals
+                    and elapsed_ms + stage.cost_ms > self.deadline_ms):
+                stage.deferred += 1
+                stage.deferred_in_row += 1
+                continue
+
+            stage_start = time.perf_counter()
+            try:
+                outputs = stage.fn(**{name: self.board[name][1] for name in stage.inputs})
+            except StopIteration:
+                return False
+            cost_ms = (time.perf_counter() - stage_start) * 1000
+            stage.cost_ms = cost_ms if stage.runs == 0 else (1 - EMA_ALPHA) * stage.cost_ms + EMA_ALPHA * cost_ms
+            stage.runs += 1
+            stage.deferred_in_row = 0
+            stage.last_run = now
+            stage.seen = {name: self.board[name][0] for name in stage.inputs}
+            for name, value in (outputs or {}).items():
+                self.publish(name, value)
+
+        if self.deadline_ms is not None and (time.perf_counter() - start) * 1000 > self.deadline_ms:
+            self.missed_deadlines += 1
+        self.tick_count += 1
+        return True
+
+    def run(self):
+        while self.tick():
+            pass
+
+    def report(self):
+        lines = [f"{self.tick_count} ticks, {self.missed_deadlines} over deadline"]
+        for stage in self.stages:
+            lines.append(f"  {stage.name:12s} runs {stage.runs:7d}  deferred {stage.deferred:6d}  ~{stage.cost_ms:7.2f} ms")
+        return "\n".join(lines)
@@ -0,0 +1,164 @@
+import numpy as np
+import cv2
+
+def normalize_depth(depth_array):
+    return cv2.normalize(depth_array, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+def smooth_depth(depth_array):
+    return cv2.GaussianBlur(depth_array, (5, 5), 0)
+
+def adaptive_threshold(depth_array, k=1.0):
+    mean_depth = np.mean(depth_array)
+    std_depth = np.std(depth_array)
+    return mean_depth - k * std_depth
+
+class DepthPostProcessor:
+    """Fused replacement for normalize_depth + smooth_depth + adaptive_threshold.
+
+    Reuses preallocated buffers across frames: min/max in one pass, the scaled
+    uint8 conversion in a second, the 5x5 blur in a third and mean/std together in
+    a fourth, with no per-frame allocations once the input shape is stable. With
+    scale < 1 the map is first shrunk with INTER_AREA; callers then pass the same
+    scale to box_depth / check_track_proximity so boxes line up.
+    """
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.shape = None
+        self.resized = None
+        self.normalized = None
+        self.smoothed = None
+        self.mean = 0.0
+        self.std = 0.0
+
+    def _allocate(self, shape, dtype):
+        height, width = shape[:2]
+        if self.scale != 1.0:
+            out_h, out_w = max(1, round(height * self.scale)), max(1, round(width * self.scale))
+            self.resized = np.empty((out_h, out_w), dtype=dtype)
+        else:
+            out_h, out_w = height, width
+            self.resized = None
+        self.normalized = np.empty((out_h, out_w), dtype=np.uint8)
+        self.smoothed = np.empty((out_h, out_w), dtype=np.uint8)
+        self.shape = (shape[:2], dtype)
+
+    def process(self, depth_array):
+        """Return the normalized, smoothed uint8 map (a reused buffer; copy it to keep it)."""
+        if self.shape != (depth_array.shape[:2], depth_array.dtype):
+            self._allocate(depth_array.shape, depth_array.dtype)
+
+        src = depth_array
+        if self.resized is not None:
+            src = cv2.resize(depth_array, self.resized.shape[::-1], dst=self.resized, interpolation=cv2.INTER_AREA)
+
+        min_val, max_val, _, _ = cv2.minMaxLoc(src)
+        alpha = 255.0 / (max_val - min_val) if max_val > min_val else 0.0
+        beta = -min_val * alpha
+        if src.dtype != np.uint8:
+            beta -= 0.5  # convertScaleAbs rounds; normalize_depth truncates float maps via astype
+        cv2.convertScaleAbs(src, dst=self.normalized, alpha=alpha, beta=beta)
+        cv2.GaussianBlur(self.normalized, (5, 5), 0, dst=self.smoothed)
+
+        mean, std = cv2.meanStdDev(self.smoothed)
+        self.mean, self.std = float(mean[0, 0]), float(std[0, 0])
+        return self.smoothed
+
+    def adaptive_threshold(self, k=1.0):
+        """Same value as adaptive_threshold() on the last processed map, without another pass."""
+        return self.mean - k * self.std
+
+DETECTION_THRESHOLD = 0.7  # Confidence threshold for drawn boxes and the command snapshot
+HAZARD_THRESHOLD = 0.5  # Lower floor for tracking and proximity alerts, as check_proximity uses
+
+# Define object-specific thresholds (in normalized depth units)
+object_thresholds = {
+    'person': 30, 'chair': 15, 'table': 25, 'car': 40, 'bicycle': 20,
+    'motorcycle': 35, 'bus': 50, 'truck': 45, 'dog': 10, 'cat': 10,
+    'bottle': 5, 'laptop': 10, 'tv': 20, 'couch': 30, 'bed': 35,
+    'refrigerator': 25, 'book': 5, 'clock': 10, 'vase': 8, 'potted plant': 12
+}
+
+def detections_from_xyxy(xyxy, names, min_conf):
+    """Convert one image's results.xyxy tensor into (x1, y1, x2, y2, conf, name) tuples."""
+    detections = []
+    for det in xyxy.tolist():
+        x1, y1, x2, y2, conf, cls = det
+        if conf < min_conf:
+            continue
+        detections.append((x1, y1, x2, y2, conf, names[int(cls)]))
+    return detections
+
+def check_proximity(depth_array, results, get_threshold_func):
+    close_objects = []
+    all_objects = []
+    adaptive_thresh = adaptive_threshold(depth_array)
+    
+    for det in results.xyxy[0]:
+        x1, y1, x2, y2, conf, cls = det.tolist()
+        if conf < 0.5:  # Confidence filtering
+            continue
+        x1, y1, x2, y2 = map(int, [x1, y1, x2, y2])
+        object_name = results.names[int(cls)]
+        object_depth = np.mean(depth_array[y1:y2, x1:x2])
+        
+        all_objects.append(f"{object_name} (depth: {object_depth:.2f})")
+        
+        threshold = get_threshold_func(object_name)  # Call the function with object_name
+        if object_depth < min(threshold, adaptive_thresh):
+            close_objects.append(object_name)
+    
+    return close_objects, all_objects
+
+
+def box_depth(depth_array, box, scale=1.0):
+    """Mean depth inside an x1, y1, x2, y2 box clipped to the map, or None if empty.
+
+    scale maps frame coordinates onto a downsampled depth map.
+    """
+    height, width = depth_array.shape[:2]
+    x1, y1, x2, y2 = (v * scale for v in box)
+    x1, x2 = max(int(x1), 0), min(int(x2), width)
+    y1, y2 = max(int(y1), 0), min(int(y2), height)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return float(np.mean(depth_array[y1:y2, x1:x2]))
+
+def check_track_proximity(depth_array, tracks, get_threshold_func, adaptive_k=1.0,
+                          adaptive_thresh=None, scale=1.0):
+    """Per-track version of check_proximity; sets track.depth and returns the close tracks.
+
+    Pass adaptive_thresh when it is already known (e.g. from DepthPostProcessor)
+    to skip the mean/std pass over the map.
+    """
+    close_tracks = []
+    if adaptive_thresh is None:
+        adaptive_thresh = adaptive_threshold(depth_array, adaptive_k)
+
+    for track in tracks:
+        track.depth = box_depth(depth_array, track.box, scale)
+        if track.depth is None:
+            continue
+        threshold = get_threshold_func(track.name)
+        if track.depth < min(threshold, adaptive_thresh):
+            close_tracks.append(track)
+
+    return close_tracks
+
+
+def warning_message(names):
+    return f"Warning: {', '.join(names)} nearby!"
+
+
+class ProximityAlerts:
+    """Once-per-track alerting: a track is announced when it becomes close and
+    re-armed when it moves away or is lost."""
+
+    def __init__(self):
+        self.alerted_tracks = set()  # Track ids already warned about while they stay close
+
+    def update(self, close_tracks):
+        """Return the sorted names of tracks that just became close."""
+        new_alerts = sorted({t.name for t in close_tracks if t.id not in self.alerted_tracks})
+        self.alerted_tracks = {t.id for t in close_tracks}
+        return new_alerts
@@ -0,0 +1,173 @@
+import collections
+import glob
+import threading
+import time
+
+# Highest quality first. Depth sizes are Depth-Anything input sides (multiples of 14).
+TIERS = [
+    {"name": "high", "yolo": "yolov5m", "depth_size": 518},
+    {"name": "standard", "yolo": "yolov5s", "depth_size": 518},
+    {"name": "reduced", "yolo": "yolov5s", "depth_size": 364},
+    {"name": "low", "yolo": "yolov5n", "depth_size": 266},
+    {"name": "minimal", "yolo": "yolov5n", "depth_size": 182},
+]
+DEFAULT_TIER = 1  # Matches the original yolov5s + default Depth-Anything input
+
+TARGET_MS = 250.0  # Budget for depth + YOLO on one analysed frame
+ALERT_BOUND_MS = 500.0  # A single frame slower than this drops a tier immediately
+ALERT_COOLDOWN = 1  # Analysed frames after a change before the alert bound can drop another tier
+UP_RATIO = 0.6  # Step up only when the window runs below 60% of the target
+WINDOW = 10  # Analysed frames in the latency window
+COOLDOWN = 15  # Analysed frames to wait after a change before judging again
+THERMAL_LIMIT_C = 80.0  # Step down while any thermal zone is above this
+
+
+def read_max_temperature():
+    """Hottest Linux thermal zone in degrees C, or None where sysfs thermal data is unavailable."""
+    temps = []
+    for path in glob.glob("/sys/class/thermal/thermal_zone*/temp"):
+        try:
+            with open(path) as f:
+                temps.append(int(f.read().strip()) / 1000.0)
+        except (OSError, ValueError):
+            continue
+    return max(temps) if temps else None
+
+
+class QualityController:
+    """Steps quality tiers down under load or heat and back up when there is headroom.
+
+    Hysteresis comes from separate down/up thresholds (target vs UP_RATIO * target),
+    a cooldown after each change, and stepping up by one tier at a time. The alert
+    bound skips the window but still waits alert_cooldown frames after a change, so
+    a run of slow frames drops one tier per judged frame rather than one per frame.
+    """
+
+    def __init__(self, tiers=TIERS, start_tier=DEFAULT_TIER, target_ms=TARGET_MS, alert_bound_ms=ALERT_BOUND_MS,
+                 up_ratio=UP_RATIO, window=WINDOW, cooldown=COOLDOWN, thermal_limit_c=THERMAL_LIMIT_C,
+                 alert_cooldown=ALERT_COOLDOWN):
+        self.tiers = tiers
+        self.index = start_tier
+        self.target_ms = target_ms
+        self.alert_bound_ms = alert_bound_ms
+        self.alert_cooldown = alert_cooldown
+        self.up_ratio = up_ratio
+        self.cooldown = cooldown
+        self.thermal_limit_c = thermal_limit_c
+        self.latencies = collections.deque(maxlen=window)
+        self.frames_since_change = 0
+        self.last_thermal_check = 0.0
+        self.hot = False
+
+    @property
+    def tier(self):
+        return self.tiers[self.index]
+
+    def _change(self, step, reason):
+        new_index = min(max(self.index + step, 0), len(self.tiers) - 1)
+        if new_index == self.index:
+            return False
+        self.index = new_index
+        self.latencies.clear()
+        self.frames_since_change = 0
+        print(f"Quality tier -> {self.tier['name']} ({reason})")
+        return True
+
+    def _check_thermal(self):
+        now = time.monotonic()
+        if now - self.last_thermal_check >= 5.0:
+            self.last_thermal_check = now
+            temperature = read_max_temperature()
+            self.hot = temperature is not None and temperature > self.thermal_limit_c
+        return self.hot
+
+    def record(self, latency_ms):
+        """Feed one analysed frame's latency; returns True when the tier changed."""
+        self.latencies.append(latency_ms)
+        self.frames_since_change += 1
+
+        if latency_ms > self.alert_bound_ms and self.frames_since_change > self.alert_cooldown:
+            return self._change(1, f"{latency_ms:.0f} ms frame exceeded the {self.alert_bound_ms:.0f} ms alert bound")
+        if self.frames_since_change < self.cooldown or len(self.latencies) < self.latencies.maxlen:
+            return False
+
+        if self._check_thermal():
+            return self._change(1, "thermal throttling")
+        mean_ms = sum(self.latencies) / len(self.latencies)
+        if mean_ms > self.target_ms:
+            return self._change(1, f"mean {mean_ms:.0f} ms over {self.target_ms:.0f} ms target")
+        if mean_ms < self.up_ratio * self.target_ms:
+            return self._change(-1, f"mean {mean_ms:.0f} ms leaves headroom")
+        return False
+
+
+class TierModels:
+    """Loads YOLOv5 variants in the background and sets the Depth-Anything input size per tier.
+
+    A tier whose model is not loaded yet keeps running on the last model used,
+    so a tier change never stalls detection and alerts behind a hub download.
+    Only the models of the tiers next to the one in use are fetched ahead of time,
+    since the controller moves one tier per change.
+    """
+
+    def __init__(self, depth_estimator, preloaded=None, tiers=TIERS):
+        self.depth_estimator = depth_estimator
+        self.tiers = tiers
+        self.yolo_models = dict(preloaded or {})
+        self.active = next(iter(self.yolo_models.values()), None)
+        self.loading = set()
+        self.lock = threading.Lock()
+
+    def _load(self, name):
+        try:
+            import torch
+            model = torch.hub.load('ultralytics/yolov5', name)
+            with self.lock:
+                self.yolo_models[name] = model
+            print(f"Loaded {name}")
+        except Exception as e:
+            print(f"Could not load {name}: {e}")
+        finally:
+            with self.lock:
+                self.loading.discard(name)
+
+    def request(self, name):
+        """Start loading name on a background thread unless it is loaded or loading."""
+        with self.lock:
+            if name in self.yolo_models or name in self.loading:
+                return
+            self.loading.add(name)
+        threading.Thread(target=self._load, args=(name,), name=f"load-{name}", daemon=True).start()
+
+    def preload(self, tier):
+        """Start loading the models of the tiers one step either side of tier."""
+        index = self.tiers.index(tier)
+        for neighbour in self.tiers[max(index - 1, 0):index + 2]:
+            self.request(neighbour["yolo"])
+
+    def loaded(self, tier):
+        """True once tier's own model is available, rather than a stand-in."""
+        with self.lock:
+            return tier["yolo"] in self.yolo_models
+
+    def yolo(self, tier):
+        name = tier["yolo"]
+        with self.lock:
+            model = self.yolo_models.get(name)
+        if model is None:
+            if self.active is not None:
+                self.request(name)
+                return self.active
+            # Nothing to fall back on, so the first model has to be waited for
+            import torch
+            model = self.yolo_models[name] = torch.hub.load('ultralytics/yolov5', name)
+        if model is not self.active:
+            self.active = model
+            self.preload(tier)
+        return model
+
+    def depth(self, tier):
+        # The pipeline resizes its output back to the input image, so only the model input shrinks
+        size = tier["depth_size"]
+        self.depth_estimator.image_processor.size = {"height": size, "width": size}
+        return self.depth_estimator
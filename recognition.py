@@ -9,9 +9,67 @@ relationships = {
     1: {"name": "Akshay Kumar", "relationships": "Friend"}
 }
 
-def recognize_faces(frame, speak_func, recognize=False):
+HAAR_WINDOW = 24  # Native window of the frontal face cascade
+HEAD_FRACTION = 0.5  # Faces are searched in the top half of a person box
+MIN_FACE_FRACTION = 0.15  # Smallest face considered, relative to person box width
+FULL_SCAN_SCALE = 0.5  # Frame scale for the fallback scan when no person boxes are known
+
+def detect_faces(gray, person_boxes=None, min_neighbors=5):
+    """Detect faces, searching only the head region of person boxes when they are known.
+
+    Each head region is shrunk so the smallest plausible face for that box maps to
+    the cascade's native window, so the cascade's own pyramid starts small. With
+    person_boxes=None (detector did not run) the whole frame is scanned at
+    FULL_SCAN_SCALE; an empty list means YOLO saw nobody, so nothing is scanned.
+    Returns (x, y, w, h) boxes in full-frame coordinates.
+    """
+    height, width = gray.shape[:2]
+    if person_boxes is None:
+        small = cv2.resize(gray, None, fx=FULL_SCAN_SCALE, fy=FULL_SCAN_SCALE, interpolation=cv2.INTER_AREA)
+        faces = face_cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=min_neighbors,
+                                              minSize=(HAAR_WINDOW, HAAR_WINDOW))
+        return [tuple(int(v / FULL_SCAN_SCALE) for v in face) for face in faces]
+
+    faces = []
+    for x1, y1, x2, y2 in person_boxes:
+        x1, x2 = max(int(x1), 0), min(int(x2), width)
+        y1 = max(int(y1), 0)
+        y2 = min(int(y1 + (y2 - y1) * HEAD_FRACTION), height)
+        box_width = x2 - x1
+        if box_width < HAAR_WINDOW or y2 - y1 < HAAR_WINDOW:
+            continue
+
+        min_face = max(HAAR_WINDOW, int(box_width * MIN_FACE_FRACTION))
+        scale = HAAR_WINDOW / min_face
+        roi = gray[y1:y2, x1:x2]
+        if scale < 1.0:
+            roi = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        max_face = max(HAAR_WINDOW, int(box_width * scale))
+        for (x, y, w, h) in face_cascade.detectMultiScale(roi, scaleFactor=1.1, minNeighbors=min_neighbors,
+                                                         minSize=(HAAR_WINDOW, HAAR_WINDOW),
+                                                         maxSize=(max_face, max_face)):
+            faces.append((x1 + int(x / scale), y1 + int(y / scale), int(w / scale), int(h / scale)))
+    return faces
+
+def identify_faces(gray, person_boxes=None, max_distance=70):
+    """Return ((x, y, w, h), person info or None, confident) for each face detect_faces finds."""
+    faces = []
+    for (x, y, w, h) in detect_faces(gray, person_boxes):
+        label, distance = recognizer.predict(gray[y:y+h, x:x+w])
+        # Lower confidence is better in LBPHFaceRecognizer
+        faces.append(((x, y, w, h), relationships.get(label), distance < max_distance))
+    return faces
+
+def draw_faces(frame, faces):
+    for (x, y, w, h), person_info, confident in faces:
+        color = (0, 255, 0) if confident else (0, 0, 255)
+        label = person_info["name"] if confident and person_info else "Unknown"
+        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+        cv2.putText(frame, label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+
+def recognize_faces(frame, speak_func, recognize=False, person_boxes=None):
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+    faces = detect_faces(gray, person_boxes)
     
     for (x, y, w, h) in faces:
         roi_gray = gray[y:y+h, x:x+w]
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+
+import cv2
+import numpy as np
+
+from proximity import HAZARD_THRESHOLD, ProximityAlerts, check_track_proximity, detections_from_xyxy, object_thresholds
+from tracker import Sort
+
+CHUNK_FRAMES = 256  # Frames per chunk directory
+DEPTH_SCALE = 4  # Depth maps are stored at 1/DEPTH_SCALE resolution as uint8
+COMPRESS_DEPTH = True  # Deflate each chunk's depth maps; set False to keep them memory-mappable
+
+
+class Recorder:
+    """Writes per-frame depth maps and raw detections to a chunked store of .npy/.npz files.
+
+    Layout of a recording directory:
+        manifest.json               names, frame/depth shapes, detect_every, chunk list
+        chunk_000000/frames.npy     (n, 2) float64 frame index and timestamp
+        chunk_000000/depth.npz      (n, h / DEPTH_SCALE, w / DEPTH_SCALE) uint8, deflated
+                                    (depth.npy, memory-mappable, with compress_depth=False)
+        chunk_000000/detections.npy (m, 6) float32 x1, y1, x2, y2, conf, class for all n frames
+        chunk_000000/offsets.npy    (n + 1,) int64 row ranges into detections.npy
+    Only detector frames are recorded; detect_every says how many analysed frames
+    each one stood for, so replay can re-run the tracker's predicted frames between them.
+    The manifest is rewritten after every chunk, so an interrupted recording stays readable.
+    Smoothed depth maps compress several times over, so depth is deflated by default;
+    replay then decompresses one chunk at a time instead of memory-mapping it.
+    """
+
+    def __init__(self, path, names, chunk_frames=CHUNK_FRAMES, depth_scale=DEPTH_SCALE,
+                 compress_depth=COMPRESS_DEPTH, detect_every=1):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.depth_scale = depth_scale
+        self.compress_depth = compress_depth
+        names = dict(enumerate(names)) if isinstance(names, (list, tuple)) else dict(names)
+        self.manifest = {"version": 1, "names": {str(k): v for k, v in names.items()},
+                         "depth_scale": depth_scale, "frame_shape": None, "depth_shape": None,
+                         "detect_every": detect_every, "chunks": []}
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self.frames, self.depths, self.detections, self.counts = [], [], [], []
+
+    def add(self, frame_index, timestamp, depth_array, xyxy, frame_shape=None):
+        """Record one analysed frame; xyxy is results.xyxy[i] (tensor or array).
+
+        frame_shape is the shape the boxes refer to, when depth_array has another resolution.
+        """
+        if self.manifest["frame_shape"] is None:
+            height, width = depth_array.shape[:2]
+            self.manifest["frame_shape"] = list(frame_shape[:2]) if frame_shape is not None else [height, width]
+            self.manifest["depth_shape"] = [max(1, height // self.depth_scale), max(1, width // self.depth_scale)]
+        depth_h, depth_w = self.manifest["depth_shape"]
+        small = cv2.resize(depth_array, (depth_w, depth_h), interpolation=cv2.INTER_AREA)
+
+        detections = np.array(xyxy.tolist(), dtype=np.float32).reshape(-1, 6)
+        self.frames.append((frame_index, timestamp))
+        self.depths.append(small.astype(np.uint8))
+        self.detections.append(detections)
+        self.counts.append(len(detections))
+        if len(self.frames) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if not self.frames:
+            return
+        chunk_name = f"chunk_{len(self.manifest['chunks']):06d}"
+        chunk_dir = os.path.join(self.path, chunk_name)
+        os.makedirs(chunk_dir, exist_ok=True)
+        np.save(os.path.join(chunk_dir, "frames.npy"), np.array(self.frames, dtype=np.float64))
+        if self.compress_depth:
+            depth_file = "depth.npz"
+            np.savez_compressed(os.path.join(chunk_dir, depth_file), depth=np.stack(self.depths))
+        else:
+            depth_file = "depth.npy"
+            np.save(os.path.join(chunk_dir, depth_file), np.stack(self.depths))
+        np.save(os.path.join(chunk_dir, "detections.npy"), np.concatenate(self.detections))
+        np.save(os.path.join(chunk_dir, "offsets.npy"), np.concatenate([[0], np.cumsum(self.counts)]).astype(np.int64))
+        self.manifest["chunks"].append({"name": chunk_name, "frames": len(self.frames), "depth": depth_file})
+        with open(os.path.join(self.path, "manifest.json"), "w") as f:
+            json.dump(self.manifest, f)
+        self._reset_buffers()
+
+    def close(self):
+        self.flush()
+
+
+class ReplayResults:
+    """Stands in for a YOLOv5 Detections object: results.xyxy[0] rows and results.names."""
+
+    def __init__(self, detections, names):
+        self.xyxy = [detections]
+        self.names = names
+
+
+class Replay:
+    """Iterates a recording as (frame_index, timestamp, depth_array, results) without loading models.
+
+    Depth maps are read at stored resolution (memory-mapped, or one decompressed
+    chunk at a time) and boxes are scaled down to match, so check_proximity and
+    check_track_proximity run on them unchanged.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.names = {int(k): v for k, v in self.manifest["names"].items()}
+        frame_h, frame_w = self.manifest["frame_shape"]
+        depth_h, depth_w = self.manifest["depth_shape"]
+        self.box_scale = np.array([depth_w / frame_w, depth_h / frame_h] * 2, dtype=np.float32)
+
+    def __len__(self):
+        return sum(chunk["frames"] for chunk in self.manifest["chunks"])
+
+    def __iter__(self):
+        for chunk in self.manifest["chunks"]:
+            chunk_dir = os.path.join(self.path, chunk["name"])
+            frames = np.load(os.path.join(chunk_dir, "frames.npy"), mmap_mode="r")
+            depth_file = chunk.get("depth", "depth.npy")
+            if depth_file.endswith(".npz"):
+                with np.load(os.path.join(chunk_dir, depth_file)) as archive:
+                    depth = archive["depth"]
+            else:
+                depth = np.load(os.path.join(chunk_dir, depth_file), mmap_mode="r")
+            detections = np.load(os.path.join(chunk_dir, "detections.npy"), mmap_mode="r")
+            offsets = np.load(os.path.join(chunk_dir, "offsets.npy"))
+            for i in range(len(frames)):
+                rows = np.array(detections[offsets[i]:offsets[i + 1]])
+                rows[:, :4] *= self.box_scale
+                yield int(frames[i, 0]), float(frames[i, 1]), depth[i], ReplayResults(rows, self.names)
+
+
+def replay_alerts(replay, thresholds=None, threshold_scale=1.0, adaptive_k=1.0, default_threshold=20):
+    """Run the tracker, per-track proximity and once-per-track alert logic over a recording.
+
+    As in the live loop, each recorded detector frame is followed by
+    detect_every - 1 frames where tracks advance on their prediction and are
+    checked against the same depth map. Returns a list of (frame_index, [newly
+    close object names]) for every frame that would have produced a spoken warning.
+    """
+    thresholds = object_thresholds if thresholds is None else thresholds
+    get_threshold = lambda obj: thresholds.get(obj, default_threshold) * threshold_scale
+    detect_every = replay.manifest.get("detect_every", 1)
+    tracker = Sort(max_age=3 * detect_every)  # Same age limit as VisionStages
+    proximity_alerts = ProximityAlerts()
+    alerts = []
+
+    for frame_index, timestamp, depth_array, results in replay:
+        detections = detections_from_xyxy(results.xyxy[0], results.names, HAZARD_THRESHOLD)
+        tracks = tracker.update(detections)
+        for step in range(detect_every):
+            if step:
+                tracks = tracker.predict()
+            close_tracks = check_track_proximity(depth_array, tracks, get_threshold, adaptive_k)
+            new_alerts = proximity_alerts.update(close_tracks)
+            if new_alerts:
+                alerts.append((frame_index + step, new_alerts))
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recordings or sweep proximity thresholds over them without models.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    info = subparsers.add_parser("info", help="Summarise a recording")
+    info.add_argument("recording")
+    sweep = subparsers.add_parser("sweep", help="Count alerts for each threshold setting")
+    sweep.add_argument("recording")
+    sweep.add_argument("--scales", type=float, nargs="+", default=[0.5, 0.75, 1.0, 1.25, 1.5],
+                       help="Multipliers applied to object_thresholds")
+    sweep.add_argument("--adaptive-k", type=float, nargs="+", default=[1.0],
+                       help="Values of k in the mean - k * std adaptive threshold")
+    sweep.add_argument("--out", default=None, help="Write every alert per setting as JSON (usable as a regression fixture)")
+    args = parser.parse_args()
+
+    replay = Replay(args.recording)
+    if args.command == "info":
+        print(f"{len(replay)} frames in {len(replay.manifest['chunks'])} chunks, "
+              f"frame {replay.manifest['frame_shape']}, depth {replay.manifest['depth_shape']}, "
+              f"detector every {replay.manifest.get('detect_every', 1)} frames")
+        return
+
+    report = {}
+    for scale in args.scales:
+        for k in args.adaptive_k:
+            alerts = replay_alerts(replay, threshold_scale=scale, adaptive_k=k)
+            report[f"scale={scale},k={k}"] = alerts
+            objects = sorted({name for _, names in alerts for name in names})
+            print(f"scale {scale:5.2f}  k {k:4.2f}: {len(alerts):5d} alerts  {', '.join(objects)}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import collections
+import gc
+import os
+import queue
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from frame_loop import VisionStages
+from object_memory import ObjectMemory
+from pipeline import Scheduler
+from quality import QualityController
+
+NAMES = {0: "person", 56: "chair", 39: "bottle"}
+
+
+class StubResults:
+    """Minimal stand-in for a YOLOv5 Detections object."""
+
+    def __init__(self, rows):
+        self.xyxy = [rows]
+        self.names = NAMES
+
+
+class StubYolo:
+    """Returns a few boxes that drift across the frame, like objects passing by."""
+
+    def __call__(self, frame):
+        height, width = frame.shape[:2]
+        t = int(frame[0, 0, 0])
+        rows = []
+        for i, cls in enumerate(NAMES):
+            x = (t * (i + 2) * 3) % max(1, width - 120)
+            y = 40 + i * 120
+            rows.append([x, y, x + 100, min(height, y + 150), 0.9, cls])
+        return StubResults(np.array(rows, dtype=np.float32))
+
+
+class StubDepthEstimator:
+    """Allocates a fresh PIL depth image per call, as the Hugging Face pipeline does."""
+
+    def __call__(self, image):
+        width, height = image.size
+        ramp = np.linspace(0, 255, width, dtype=np.float32)[None, :].repeat(height, axis=0)
+        return {"depth": Image.fromarray(ramp.astype(np.uint8))}
+
+
+class StubTierModels:
+    def __init__(self):
+        self.yolo_model = StubYolo()
+        self.depth_estimator = StubDepthEstimator()
+
+    def yolo(self, tier):
+        return self.yolo_model
+
+    def loaded(self, tier):
+        return True
+
+    def depth(self, tier):
+        return self.depth_estimator
+
+
+def synthetic_frames(count, width, height):
+    """Frames whose top-left pixel encodes the frame number, so stubs can animate boxes."""
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for index in range(count):
+        frame = background.copy()
+        frame[0, 0, 0] = index % 256
+        yield index, frame
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, falling back to ru_maxrss)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 1024
+
+
+def type_counts():
+    return collections.Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+def without_harness(snapshot):
+    """Drop the harness's own bookkeeping (this file, Counter, tracemalloc) from a snapshot."""
+    return snapshot.filter_traces([
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, collections.__file__),
+        tracemalloc.Filter(False, tracemalloc.__file__),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the video frame loop with stub models and synthetic frames, "
+                    "sample memory, and fail if it grows past a budget.")
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--sample-every", type=int, default=500, help="Frames between memory samples")
+    parser.add_argument("--warmup", type=int, default=500, help="Frames before the baseline sample")
+    parser.add_argument("--budget-mb", type=float, default=20.0, help="Allowed RSS growth after warmup")
+    parser.add_argument("--top", type=int, default=15, help="Allocation sites and types to report")
+    parser.add_argument("--no-speech-drain", action="store_true",
+                        help="Leave the speech queue undrained, as when TTS falls behind")
+    args = parser.parse_args()
+
+    speech_queue = queue.Queue()
+    snapshots = {"latest": None}
+
+    def publish(frame, detections, close_objects):
+        snapshots["latest"] = {"frame": frame, "detections": detections,
+                               "close_objects": close_objects, "timestamp": time.time()}
+
+    def drain_speech():
+        while True:
+            speech_queue.get()
+
+    if not args.no_speech_drain:
+        threading.Thread(target=drain_speech, daemon=True).start()
+
+    vision = VisionStages(StubTierModels(), QualityController(), object_memory=ObjectMemory(),
+                          publish=publish, speak=speech_queue.put)
+    frames = synthetic_frames(args.frames, args.width, args.height)
+    scheduler = Scheduler(vision.analysis_stages(vision.capture_stage(lambda: next(frames, (None, None)))) + [vision.render_stage()])
+
+    tracemalloc.start(25)
+    baseline_rss = baseline_snapshot = None
+    samples = []  # (frames done, rss MB, traced MB, speech queue length)
+    # Only the warmup and latest type counts are kept whole; each interval keeps its top growth
+    baseline_types = last_types = None
+    type_steps = []  # {type name: growth} for the top types of each interval
+    start = time.time()
+    devnull = open(os.devnull, "w")
+    for done in range(1, args.frames + 1):
+        stdout, sys.stdout = sys.stdout, devnull  # Silence per-alert prints
+        try:
+            scheduler.tick()
+        finally:
+            sys.stdout = stdout
+
+        if done == args.warmup or (done > args.warmup and done % args.sample_every == 0) or done == args.frames:
+            gc.collect()
+            rss = rss_mb()
+            traced, _ = tracemalloc.get_traced_memory()
+            types = type_counts()
+            growing = ""
+            if last_types is not None:
+                delta = types.copy()
+                delta.subtract(last_types)
+                type_steps.append({name: count for name, count in delta.most_common(args.top) if count > 0})
+                growing = "  " + ", ".join(f"{name} +{count}" for name, count in delta.most_common(3) if count > 0)
+                del delta
+            else:
+                baseline_types = types
+            last_types = types
+            del types
+            samples.append((done, rss, traced / 2**20, speech_queue.qsize()))
+            print(f"frame {done:7d}  rss {rss:8.1f} MB  traced {traced / 2**20:7.2f} MB  "
+                  f"speech queue {speech_queue.qsize()}{growing}")
+            if baseline_rss is None:
+                baseline_rss = rss
+                baseline_snapshot = tracemalloc.take_snapshot()
+    devnull.close()
+
+    elapsed = time.time() - start
+    final_snapshot = tracemalloc.take_snapshot()
+    growth = samples[-1][1] - baseline_rss
+    print(f"\n{args.frames} frames in {elapsed:.1f}s ({args.frames / elapsed:.0f} FPS with stub models)")
+    print(scheduler.report())
+
+    print(f"\nTop allocation sites since frame {args.warmup}:")
+    # Filtered only now, so the filter's own pattern caching lands after both snapshots
+    for stat in without_harness(final_snapshot).compare_to(without_harness(baseline_snapshot), "lineno")[:args.top]:
+        print(f"  {stat}")
+
+    print("\nFastest-growing object types since warmup, with growth per interval ('.' outside its top):")
+    delta = last_types.copy()
+    delta.subtract(baseline_types)
+    for name, count in delta.most_common(args.top):
+        if count > 0:
+            steps = [f"{step[name]:+d}" if name in step else "." for step in type_steps]
+            print(f"  {name:30s} +{count:<8d} {' '.join(steps)}")
+
+    print(f"\nRSS growth after warmup: {growth:+.1f} MB (budget {args.budget_mb:.1f} MB)")
+    if growth > args.budget_mb:
+        print("FAIL: memory grew past the budget")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ import speech_recognition as sr
 import pyttsx3
 import requests
 import logging
+from audio_frontend import AudioFrontEnd, MicrophoneSource
+from chat_context import ConversationContext, ResponseCache, local_answer
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, 
@@ -16,6 +18,12 @@ logger = logging.getLogger(__name__)
 # Initialize text-to-speech engine
 engine = pyttsx3.init()
 
+# Microphone front end; only segments that pass local VAD reach recognize_google
+voice_frontend = AudioFrontEnd(MicrophoneSource())
+
+# Answers to idempotent, non-contextual questions, shared by text and voice chat
+response_cache = ResponseCache()
+
 def verify_gemini_api_key(api_key):
     """Verify if the Gemini API key is valid."""
     try:
@@ -57,24 +65,22 @@ def setup_gemini(api_key):
 def listen_for_speech():
     """Listen for speech input and convert to text."""
     recognizer = sr.Recognizer()
-    with sr.Microphone() as source:
-        print("Listening...")
-        recognizer.adjust_for_ambient_noise(source, duration=1)
-        try:
-            audio = recognizer.listen(source, timeout=10)
-            print("Processing speech...")
-            text = recognizer.recognize_google(audio)
-            print(f"You said: {text}")
-            return text
-        except sr.WaitTimeoutError:
-            print("No speech detected. Please try again.")
-            return None
-        except sr.UnknownValueError:
-            print("Could not understand audio. Please try again.")
-            return None
-        except sr.RequestError as e:
-            print(f"Speech recognition service error: {e}")
-            return None
+    print("Listening...")
+    try:
+        audio = voice_frontend.listen_once(timeout=10)
+        print("Processing speech...")
+        text = recognizer.recognize_google(audio)
+        print(f"You said: {text}")
+        return text
+    except sr.WaitTimeoutError:
+        print("No speech detected. Please try again.")
+        return None
+    except sr.UnknownValueError:
+        print("Could not understand audio. Please try again.")
+        return None
+    except sr.RequestError as e:
+        print(f"Speech recognition service error: {e}")
+        return None
 
 def speak_text(text):
     """Convert text to speech."""
@@ -87,9 +93,10 @@ def chat_with_gemini_text(model, max_retries=3):
     print("\n=== Gemini Text Chat (Debug Mode) ===")
     print("Type 'exit' to end the chat session")
     
-    chat = model.start_chat(history=[
-        {"role": "user", "parts": [{"text": "Hello"}]},
-        {"role": "model", "parts": [{"text": "Great to meet you. What would you like to know?"}]}
+    # Bounded history instead of start_chat, which resends every turn
+    context = ConversationContext(model, greeting=[
+        ("user", "Hello"),
+        ("model", "Great to meet you. What would you like to know?")
     ])
     
     while True:
@@ -98,16 +105,24 @@ def chat_with_gemini_text(model, max_retries=3):
         if user_input.lower() == 'exit':
             print("Ending chat session")
             break
+
+        cached = local_answer(user_input) or response_cache.get(user_input)
+        if cached:
+            print(f"Gemini: {cached}")
+            continue
         
         retry_count = 0
         while retry_count < max_retries:
             try:
                 logger.debug(f"Sending message to Gemini: {user_input}")
-                response = chat.send_message(user_input, generation_config={"max_output_tokens": 2048})
+                response = model.generate_content(context.contents(user_input),
+                                                  generation_config={"max_output_tokens": 2048})
                 logger.debug(f"Response received from Gemini")
                 
                 if hasattr(response, 'text'):
                     print(f"Gemini: {response.text}")
+                    context.add_exchange(user_input, response.text)
+                    response_cache.put(user_input, response.text)
                     break
                 else:
                     logger.warning("Received response without text attribute")
@@ -140,6 +155,11 @@ def chat_with_gemini_voice(model, max_retries=3):
         if user_input.lower() == 'exit':
             speak_text("Ending chat session")
             break
+
+        cached = local_answer(user_input) or response_cache.get(user_input)
+        if cached:
+            speak_text(cached)
+            continue
         
         retry_count = 0
         while retry_count < max_retries:
@@ -149,6 +169,7 @@ def chat_with_gemini_voice(model, max_retries=3):
                 logger.debug(f"Response received from Gemini")
                 
                 if hasattr(response, 'text'):
+                    response_cache.put(user_input, response.text)
                     speak_text(response.text)
                     break
                 else:
@@ -0,0 +1,78 @@
+import os
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_frontend
+from audio_frontend import AudioFrontEnd, WavSource, FRAME_MS, PRE_ROLL_MS, HANGOVER_MS
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+
+
+def background(frames, rng):
+    """Quiet noise well under MIN_ENERGY."""
+    return rng.normal(0, 20, frames * FRAME_SAMPLES)
+
+
+def tone(frames):
+    """A loud 440 Hz tone standing in for voiced speech."""
+    t = np.arange(frames * FRAME_SAMPLES) / SAMPLE_RATE
+    return 8000 * np.sin(2 * np.pi * 440 * t)
+
+
+def write_wav(path, parts):
+    samples = np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+
+@pytest.fixture(autouse=True)
+def energy_gating_only(monkeypatch):
+    # webrtcvad would judge a pure tone differently; the gating logic is what is under test
+    monkeypatch.setattr(audio_frontend, "webrtcvad", None)
+
+
+def run(path):
+    front_end = AudioFrontEnd(WavSource(str(path)))
+    front_end.start(calibrate_s=0.3)
+    segments = list(front_end.segments())
+    front_end.stop()
+    return front_end, segments
+
+
+def test_segment_keeps_pre_roll_and_hangover(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / "phrase.wav"
+    write_wav(path, [background(30, rng), tone(20), background(40, rng)])
+
+    front_end, segments = run(path)
+
+    assert len(segments) == 1
+    samples = np.frombuffer(segments[0].get_raw_data(), dtype=np.int16)
+    pre_roll = PRE_ROLL_MS // FRAME_MS * FRAME_SAMPLES
+    hangover = HANGOVER_MS // FRAME_MS * FRAME_SAMPLES
+    assert len(samples) == pre_roll + 20 * FRAME_SAMPLES + hangover
+    # The onset sits right after the pre-roll, and the tail is the hangover's silence
+    assert np.abs(samples[:pre_roll]).max() < 200
+    assert np.abs(samples[pre_roll:pre_roll + FRAME_SAMPLES]).max() > 4000
+    assert np.abs(samples[-hangover:]).max() < 200
+
+
+def test_short_burst_is_rejected(tmp_path):
+    rng = np.random.default_rng(1)
+    path = tmp_path / "click_then_phrase.wav"
+    write_wav(path, [background(30, rng), tone(2), background(40, rng), tone(20), background(40, rng)])
+
+    front_end, segments = run(path)
+
+    assert len(segments) == 1
+    assert front_end.segments_rejected == 1
+    assert front_end.segments_emitted == 1
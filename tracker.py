@@ -0,0 +1,133 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+IOU_THRESHOLD = 0.3  # Minimum IoU for a detection to continue a track
+MAX_AGE = 9  # Frames a track survives without a matching detection
+MIN_HITS = 1  # Detections needed before a track is reported
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between two (N, 4) and (M, 4) arrays of x1, y1, x2, y2 boxes."""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)[:, None, :]
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-9)
+
+
+def box_to_z(box):
+    """x1, y1, x2, y2 -> centre x, centre y, area, aspect ratio."""
+    x1, y1, x2, y2 = box
+    w, h = max(x2 - x1, 1e-3), max(y2 - y1, 1e-3)
+    return np.array([x1 + w / 2, y1 + h / 2, w * h, w / h])
+
+
+def x_to_box(x):
+    """Kalman state -> x1, y1, x2, y2."""
+    area, ratio = max(x[2], 1e-3), max(x[3], 1e-3)
+    w = np.sqrt(area * ratio)
+    h = area / w
+    return (x[0] - w / 2, x[1] - h / 2, x[0] + w / 2, x[1] + h / 2)
+
+
+class Track:
+    """One tracked object with a constant-velocity Kalman filter over (cx, cy, area, ratio)."""
+
+    # State transition and measurement model shared by all tracks
+    F = np.eye(7)
+    F[0, 4] = F[1, 5] = F[2, 6] = 1
+    H = np.eye(4, 7)
+
+    def __init__(self, track_id, box, conf, name):
+        self.id = track_id
+        self.name = name
+        self.conf = conf
+        self.depth = None
+        self.hits = 1
+        self.time_since_update = 0
+
+        self.x = np.zeros(7)
+        self.x[:4] = box_to_z(box)
+        self.P = np.eye(7) * 10.0
+        self.P[4:, 4:] *= 1000.0  # Velocities are unknown at birth
+        self.Q = np.eye(7)
+        self.Q[4:, 4:] *= 0.01
+        self.Q[6, 6] *= 0.01
+        self.R = np.eye(4)
+        self.R[2:, 2:] *= 10.0
+        self.box = box
+
+    def predict(self):
+        if self.x[2] + self.x[6] <= 0:
+            self.x[6] = 0.0  # Keep the area from collapsing below zero
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        self.time_since_update += 1
+        self.box = x_to_box(self.x)
+        return self.box
+
+    def update(self, box, conf):
+        y = box_to_z(box) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(7) - K @ self.H) @ self.P
+        self.conf = conf
+        self.hits += 1
+        self.time_since_update = 0
+        self.box = x_to_box(self.x)
+
+
+class Sort:
+    """SORT-style multi-object tracker over (x1, y1, x2, y2, conf, name) detections.
+
+    Call update() on frames where the detector ran and predict() on the frames in
+    between; both return the live tracks with their current boxes, so boxes and
+    proximity stay current while YOLO runs only every Nth frame. Detections only
+    associate with tracks of the same class.
+    """
+
+    def __init__(self, max_age=MAX_AGE, min_hits=MIN_HITS, iou_threshold=IOU_THRESHOLD):
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.tracks = []
+        self.next_id = 1
+
+    def predict(self):
+        for track in self.tracks:
+            track.predict()
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.max_age]
+        return self.active_tracks()
+
+    def update(self, detections):
+        for track in self.tracks:
+            track.predict()
+
+        matched_tracks, matched_dets = set(), set()
+        if self.tracks and detections:
+            iou = iou_matrix([t.box for t in self.tracks], [d[:4] for d in detections])
+            same_class = np.array([[t.name == d[5] for d in detections] for t in self.tracks])
+            iou[~same_class] = 0.0
+            rows, cols = linear_sum_assignment(-iou)
+            for row, col in zip(rows, cols):
+                if iou[row, col] < self.iou_threshold:
+                    continue
+                x1, y1, x2, y2, conf, name = detections[col]
+                self.tracks[row].update((x1, y1, x2, y2), conf)
+                matched_tracks.add(row)
+                matched_dets.add(col)
+
+        for i, (x1, y1, x2, y2, conf, name) in enumerate(detections):
+            if i not in matched_dets:
+                self.tracks.append(Track(self.next_id, (x1, y1, x2, y2), conf, name))
+                self.next_id += 1
+
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.max_age]
+        return self.active_tracks()
+
+    def active_tracks(self):
+        return [t for t in self.tracks if t.hits >= self.min_hits]